@@ -83,9 +83,10 @@ exports.uploadLeadsCSV = async (req, res, next) => {
   }
 
   const ML_API_URL = process.env.ML_API_URL || 'http://localhost:5001';
+  const ML_JOB_TIMEOUT_MS = parseInt(process.env.ML_JOB_TIMEOUT_MS || '300000', 10);
 
   try {
-    await axios.get(ML_API_URL, { timeout: 2000 });
+    await axios.get(`${ML_API_URL}/ready`, { timeout: 2000 });
   } catch (err) {
     console.error('[Health Check] ML Service unavailable:', err.message);
     return next(new ApiError(503, 'ML Service is unavailable. Please check the Python server.'));
@@ -185,21 +186,60 @@ exports.uploadLeadsCSV = async (req, res, next) => {
         contentType: 'text/csv',
       });
 
-      const response = await axios.post(`${ML_API_URL}/predict`, form, {
+      // Scoring runs as an ML job: submit, poll its progress, then page through the results.
+      const { data: job } = await axios.post(`${ML_API_URL}/jobs`, form, {
         headers: {
           ...form.getHeaders(),
         },
-        timeout: 300000,
+        timeout: 30000,
       });
 
-      const processedData = response.data;
+      // The first DELETE cancels an unfinished job, the second removes what it spooled.
+      const discardJob = async () => {
+        await axios.delete(`${ML_API_URL}/jobs/${job.job_id}`).catch(() => {});
+        await axios.delete(`${ML_API_URL}/jobs/${job.job_id}`).catch(() => {});
+      };
+
+      const deadline = Date.now() + ML_JOB_TIMEOUT_MS;
+      let jobStatus = job;
+      while (jobStatus.status === 'queued' || jobStatus.status === 'running') {
+        if (Date.now() > deadline) {
+          await discardJob();
+          const error = `ML job did not finish within ${Math.round(ML_JOB_TIMEOUT_MS / 1000)}s`;
+          console.error('❌ ML API Error:', error);
+          uploadSession.updateSession(sessionId, { status: 'error', error });
+          return;
+        }
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        ({ data: jobStatus } = await axios.get(`${ML_API_URL}/jobs/${job.job_id}`, { timeout: 10000 }));
+      }
 
-      if (processedData.error) {
-        console.error('❌ ML API Error:', processedData.error);
-        uploadSession.updateSession(sessionId, { status: 'error', error: processedData.error });
+      if (jobStatus.status !== 'done') {
+        await discardJob();
+        const error = jobStatus.error || `ML job ${jobStatus.status}`;
+        console.error('❌ ML API Error:', error);
+        uploadSession.updateSession(sessionId, { status: 'error', error });
         return;
       }
 
+      const processedData = [];
+      let offset = 0;
+      while (offset !== null) {
+        const page = await axios.get(`${ML_API_URL}/jobs/${job.job_id}/results`, {
+          params: { offset, limit: 5000, format: 'split' },
+          timeout: 60000,
+        });
+        const { columns, data: rows } = page.data;
+        rows.forEach((values) => {
+          const obj = {};
+          columns.forEach((col, index) => (obj[col] = values[index]));
+          processedData.push(obj);
+        });
+        const next = page.headers['x-next-offset'];
+        offset = next ? parseInt(next, 10) : null;
+      }
+      axios.delete(`${ML_API_URL}/jobs/${job.job_id}`).catch(() => {});
+
       if (!Array.isArray(processedData)) {
         console.error('❌ Invalid output format from ML API');
         uploadSession.updateSession(sessionId, {
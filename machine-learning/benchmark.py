@@ -0,0 +1,271 @@
+"""Benchmarks for the scoring and explanation hot paths.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json     # exit code 1 on regression
+    python benchmark.py --baseline run1.json run2.json run3.json
+
+Throughput and median latency are compared with --tolerance. Tail latency
+(p99) and the single-run start-up and artifact-load timings swing far more
+between identical runs, so they have their own, looser --tail-tolerance and
+--startup-tolerance. Given several baseline reports, each metric is
+compared with its median across them.
+
+Leads are sampled from data/bank-full.csv when it exists, otherwise
+generated. Caches are disabled unless --with-caches is passed, so repeated
+runs measure the model rather than the cache.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA = os.path.join(BASE_DIR, 'data/bank-full.csv')
+
+CATEGORIES = {
+    'job': ['admin.', 'blue-collar', 'entrepreneur', 'housemaid', 'management', 'retired', 'self-employed',
+            'services', 'student', 'technician', 'unemployed', 'unknown'],
+    'marital': ['married', 'single', 'divorced'],
+    'education': ['primary', 'secondary', 'tertiary', 'unknown'],
+    'default': ['no', 'yes'],
+    'housing': ['yes', 'no'],
+    'loan': ['no', 'yes'],
+    'contact': ['cellular', 'unknown', 'telephone'],
+    'month': ['may', 'jul', 'aug', 'jun', 'nov', 'apr', 'feb', 'jan', 'oct', 'sep', 'mar', 'dec'],
+    'poutcome': ['unknown', 'failure', 'other', 'success'],
+}
+
+# Metrics compared against a baseline, and whether a higher value is better.
+HIGHER_IS_BETTER = {"rows_per_sec": True, "p50_ms": False, "p99_ms": False, "mean_ms": False, "seconds": False}
+TAIL_METRICS = ("p99_ms",)
+STARTUP_SECTIONS = ("startup.", "load_artifacts.")
+
+
+def synthetic_leads(n, seed=0):
+    """Leads shaped like the bank-marketing data: the 16 input fields with plausible ranges."""
+    rng = np.random.default_rng(seed)
+    contacted = rng.random(n) < 0.18
+    df = pd.DataFrame({
+        'age': np.clip(rng.normal(41, 10.5, n), 18, 95).astype(int),
+        'balance': (rng.lognormal(6.5, 1.6, n) - 400).astype(int),
+        'day': rng.integers(1, 32, n),
+        'duration': rng.exponential(258, n).astype(int),
+        'campaign': rng.geometric(0.37, n),
+        'pdays': np.where(contacted, rng.integers(1, 872, n), -1),
+        'previous': np.where(contacted, rng.poisson(2.5, n) + 1, 0),
+    })
+    for col, values in CATEGORIES.items():
+        weights = np.linspace(2.0, 1.0, len(values))
+        df[col] = rng.choice(values, n, p=weights / weights.sum())
+    return df
+
+
+def load_leads(n, data_path, seed=0):
+    if data_path and os.path.exists(data_path):
+        source = pd.read_csv(data_path, sep=None, engine='python')
+        return source.sample(n, replace=n > len(source), random_state=seed).reset_index(drop=True)
+    return synthetic_leads(n, seed)
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def latency(times):
+    ms = np.array(times) * 1000
+    return {"requests": len(ms), "p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99)),
+            "mean_ms": float(ms.mean())}
+
+
+def bench_throughput(ml_api, sizes, data_path, repeat, workdir):
+    results = {}
+    for n in sizes:
+        path = os.path.join(workdir, f"leads_{n}.csv")
+        load_leads(n, data_path, seed=n).to_csv(path, index=False)
+        bundle = ml_api.active_bundle
+        result = ml_api.process_csv_logic(path, bundle=bundle)
+        if isinstance(result, dict):
+            raise RuntimeError(result["error"])
+        best = min(timed(lambda: ml_api.process_csv_logic(path, bundle=bundle), repeat))
+        results[str(n)] = {"rows": n, "seconds": best, "rows_per_sec": n / best}
+        print(f"   process_csv_logic {n:>7} rows: {n / best:>10.0f} rows/s")
+    return results
+
+
+def bench_latency(ml_api, route, leads, warmup):
+    client = ml_api.app.test_client()
+    for lead in leads[:warmup]:
+        client.post(route, json=lead)
+
+    times = []
+    for lead in leads:
+        started = time.perf_counter()
+        response = client.post(route, json=lead)
+        times.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"{route} returned {response.status_code}: {response.get_data(as_text=True)}")
+    stats = latency(times)
+    print(f"   {route:<16} p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms")
+    return stats
+
+
+def run(args):
+    if not args.with_caches:
+        os.environ["PREDICT_CACHE_SIZE"] = "0"
+        os.environ["EXPLAIN_CACHE_SIZE"] = "0"
+    # The explainer is built during start-up so /explain latency excludes it (it is reported separately).
+    os.environ.setdefault("SHAP_WARMUP", "eager")
+    sys.path.insert(0, BASE_DIR)
+
+    print("ℹ️ Starting ML API in-process...")
+    started = time.perf_counter()
+    import ml_api
+    startup_seconds = time.perf_counter() - started
+    stages = {name: entry.get("seconds") for name, entry in ml_api.artifact_status.items()}
+    load_times = timed(lambda: ml_api.load_artifacts().close(), args.load_repeat)
+    print(f"   startup {startup_seconds:.2f}s, load_artifacts {min(load_times):.2f}s")
+
+    import sklearn
+    versions = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                "scikit-learn": sklearn.__version__}
+    try:
+        import shap
+        versions["shap"] = shap.__version__
+    except ImportError:
+        pass
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "versions": versions,
+        "model_version": ml_api.active_bundle.version,
+        "data": args.data if os.path.exists(args.data) else "synthetic",
+        "startup": {"seconds": startup_seconds, "stages": stages},
+        "load_artifacts": {"seconds": min(load_times)},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report["process_csv_logic"] = bench_throughput(ml_api, args.sizes, args.data, args.repeat, workdir)
+    report["peak_rss_mb"] = {"after_throughput": peak_rss_mb()}
+
+    leads = load_leads(args.requests, args.data, seed=1).to_dict(orient='records')
+    leads = [{k: (v.item() if hasattr(v, 'item') else v) for k, v in lead.items()} for lead in leads]
+    report["predict_single"] = bench_latency(ml_api, '/predict_single', leads, args.warmup)
+    report["explain"] = bench_latency(ml_api, '/explain', leads, args.warmup)
+    report["peak_rss_mb"]["total"] = peak_rss_mb()
+    print(f"   peak RSS {report['peak_rss_mb']['total']:.0f} MiB")
+    return report
+
+
+def flatten(report, prefix=''):
+    metrics = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def tolerance_for(name, tolerances):
+    if name.startswith(STARTUP_SECTIONS):
+        return tolerances["startup"]
+    if name.rsplit('.', 1)[-1] in TAIL_METRICS:
+        return tolerances["tail"]
+    return tolerances["default"]
+
+
+def median_report(reports):
+    """Per-metric median over several reports, as a flat baseline for ``compare``."""
+    metrics = [flatten(report) for report in reports]
+    shared = set.intersection(*(set(m) for m in metrics))
+    return {name: float(np.median([m[name] for m in metrics])) for name in shared}
+
+
+def compare(report, baseline, tolerances):
+    """Print each shared metric against the baseline; returns the names of regressed metrics.
+
+    ``tolerances`` holds the allowed relative regression for "default",
+    "tail" (p99 latency) and "startup" (start-up and artifact-load) metrics.
+    """
+    current, previous = flatten(report), flatten(baseline)
+    regressions = []
+    print(f"\n{'metric':<44} {'baseline':>12} {'current':>12} {'change':>8} {'allowed':>8}")
+    for name in sorted(set(current) & set(previous)):
+        if name.startswith("peak_rss_mb."):
+            higher_is_better = False
+        else:
+            higher_is_better = HIGHER_IS_BETTER.get(name.rsplit('.', 1)[-1])
+        if higher_is_better is None or not previous[name]:
+            continue
+        change = current[name] / previous[name] - 1
+        worse = -change if higher_is_better else change
+        tolerance = tolerance_for(name, tolerances)
+        flag = " ⚠️" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<44} {previous[name]:>12.4g} {current[name]:>12.4g} {change:>+7.1%} {tolerance:>7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=DEFAULT_DATA, help="CSV to sample leads from (synthetic if missing)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per throughput size; the best is kept")
+    parser.add_argument('--requests', type=int, default=300, help="requests per latency benchmark")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--load-repeat', type=int, default=3)
+    parser.add_argument('--with-caches', action='store_true', help="keep the prediction/explanation caches on")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', nargs='+',
+                        help="compare against a previous JSON report, or the per-metric median of several")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed relative regression in throughput and p50/mean latency (0.10 = 10%%)")
+    parser.add_argument('--tail-tolerance', type=float, default=0.50, help="allowed regression in p99 latency")
+    parser.add_argument('--startup-tolerance', type=float, default=0.50,
+                        help="allowed regression in start-up and load_artifacts time")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        tolerances = {"default": args.tolerance, "tail": args.tail_tolerance, "startup": args.startup_tolerance}
+        baselines = []
+        for path in args.baseline:
+            with open(path) as f:
+                baselines.append(json.load(f))
+        regressions = compare(report, median_report(baselines), tolerances)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed beyond their tolerance: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
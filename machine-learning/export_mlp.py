@@ -0,0 +1,62 @@
+"""Export model/mlp.keras to model/mlp.npz so the API serves the MLP without TensorFlow.
+
+    python export_mlp.py
+    python export_mlp.py --keras model/mlp.keras --output model/mlp.npz
+
+Reading the .keras archive needs h5py (pip install h5py); it is not in
+requirements.txt because the API only loads the exported .npz. When Keras
+itself is importable, the NumPy forward pass is checked against model.predict
+before anything is written. Publish the result with upload_to_hf.py, which
+lists it in the artifact manifest; the API fetches it from HF_REPO_ID.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scoring_logic.dense_net import DenseNet, read_keras, save_npz
+
+
+def check_against_keras(path, net, rows, tolerance):
+    try:
+        import keras
+    except ImportError:
+        print("ℹ️ Keras is not installed; skipping the comparison with model.predict.")
+        return True
+    model = keras.models.load_model(path, compile=False)
+    X = np.random.default_rng(0).normal(0, 1.5, (rows, net.n_features)).astype(np.float32)
+    expected = np.asarray(model.predict(X, verbose=0), dtype=np.float64).ravel()
+    diff = float(np.abs(net.predict_positive(X) - expected).max())
+    print(f"   max |numpy - keras| over {rows} rows: {diff:.2e} (tolerance {tolerance:.0e})")
+    return diff <= tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keras', default='model/mlp.keras')
+    parser.add_argument('--output', default='model/mlp.npz')
+    parser.add_argument('--check-rows', type=int, default=5000)
+    parser.add_argument('--tolerance', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    try:
+        layers = read_keras(args.keras)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    net = DenseNet(layers)
+    shapes = " -> ".join([str(net.n_features)] + [f"{k.shape[1]} {a}" for k, _, a in layers])
+    print(f"Read {len(layers)} dense layers from {args.keras}: {shapes}")
+
+    if not check_against_keras(args.keras, net, args.check_rows, args.tolerance):
+        print("❌ NumPy forward pass does not match Keras; nothing written.")
+        sys.exit(1)
+
+    save_npz(args.output, layers)
+    print(f"✅ Saved {args.output} ({os.path.getsize(args.output) / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,143 @@
 import sys
+import hmac
 import pandas as pd
 import numpy as np
 import joblib
 import json
 import os
+import io
+import itertools
+import threading
+import time
+import tempfile
+import uuid
 import warnings
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from flask import Flask, Request, Response, g, has_request_context, request, jsonify, stream_with_context
+from shap_logic.fast_tree_shap import FastTreeSHAP, MAX_PATH_SLOTS
 from shap_logic.shap_service import LeadScoringSHAPService
+from shap_logic.shap_utils import AGGREGATIONS
+from scoring_logic.feature_pipeline import FeaturePipeline, INPUT_FIELDS, NUMERIC_COLS, CATEGORICAL_COLS
+from scoring_logic.csv_stream import read_csv, read_csv_chunks
+from scoring_logic.serialization import (
+    COLUMNAR_MIMETYPES, RESULT_MIMETYPES, arrow_available, check_format, columnar_format, decode_columns,
+    encode_columns, serialize_frame,
+)
+from scoring_logic.segments import read_segments
+from scoring_logic.result_cache import ResultCache, file_fingerprint, vector_key
+from scoring_logic.iqr_bounds import read_bounds
+from scoring_logic.jobs import JobManager
+from scoring_logic.metrics import (
+    MetricsRegistry, PROMETHEUS_MIMETYPE, ROW_BUCKETS, peak_resident_memory_bytes, resident_memory_bytes,
+)
+from scoring_logic.model_bundle import ModelBundle
+from scoring_logic.model_registry import ModelUnavailable, cascade_scores, dense_scorer, sklearn_scorer
+from scoring_logic.parallel import SharedColumns, ShardPool, StaleOwner, forked_pool_worker
+from scoring_logic.tree_engine import CompiledTreeEnsemble, compile_tree_model, verify_compiled, PROBA_TOLERANCE
+from scoring_logic.artifact_store import MANIFEST_NAME, ArtifactSource, is_lfs_pointer, read_manifest, sync_artifacts
+from scoring_logic.shared_artifacts import bundle_key, bundle_nbytes, export_bundle, load_bundle
 from dotenv import load_dotenv
-from huggingface_hub import hf_hub_download
 
 load_dotenv()
 warnings.filterwarnings("ignore")
 
+class SpooledUploadRequest(Request):
+    # Each upload gets its own buffer: in memory up to UPLOAD_SPOOL_BYTES, then an
+    # anonymous temp file, so concurrent requests never share a path or leave files behind.
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, dir=UPLOAD_SPOOL_DIR)
+
 app = Flask(__name__)
+app.request_class = SpooledUploadRequest
 
 @app.route('/', methods=['GET'])
 def health_check():
     return jsonify({"status": "running", "message": "ML API is active"})
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_FILE = os.path.join(BASE_DIR, 'model/BEST_MODEL.pkl')
-SCALER_FILE = os.path.join(BASE_DIR, 'model/scaler.pkl')
-ENCODER_FILE = os.path.join(BASE_DIR, 'model/onehot_encoder.pkl')
-FEATURE_NAMES_FILE = os.path.join(BASE_DIR, 'model/feature_names.pkl')
-
-model = None
-scaler = None
-encoder = None
-feature_names = []
-shap_service = None
+@app.route('/live', methods=['GET'])
+def live():
+    if load_error is not None:
+        return jsonify({"status": "failed", "error": load_error}), 500
+    return jsonify({"status": "alive", "uptime_seconds": round(time.perf_counter() - startup_started, 3)})
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    with artifact_status_lock:
+        artifacts = {name: dict(entry) for name, entry in artifact_status.items()}
+    bundle = active_bundle
+    body = {
+        "ready": artifacts_ready.is_set(),
+        "explainer_ready": bundle is not None and bundle.explainer_ready,
+        "artifact_source": bundle.source if bundle is not None else None,
+        "bundle": bundle.describe() if bundle is not None else None,
+        "reload": reload_state,
+        "artifacts": artifacts,
+    }
+    if load_error is not None:
+        body["error"] = load_error
+    return jsonify(body), 200 if artifacts_ready.is_set() else 503
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=PROMETHEUS_MIMETYPE)
+
+UNGUARDED_ENDPOINTS = {'health_check', 'live', 'ready', 'prometheus_metrics', 'static'}
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def ensure_watcher():
+    # Without --preload gunicorn imports the app after forking, so reset_after_fork never runs in the worker.
+    if watcher_pid != os.getpid():
+        start_watcher()
+
+@app.before_request
+def require_artifacts():
+    if request.endpoint not in UNGUARDED_ENDPOINTS and not artifacts_ready.is_set():
+        return jsonify({"error": "Model artifacts are still loading", "success": False}), 503
+
+@app.errorhandler(ModelUnavailable)
+def model_unavailable(e):
+    return jsonify({"error": str(e), "success": False}), 503
+
+@app.after_request
+def add_model_version(response):
+    bundle = g.get('bundle')
+    if bundle is not None:
+        response.headers['X-Model-Version'] = bundle.version
+    return response
+
+@app.after_request
+def record_request(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    labels = (request.endpoint or "unmatched", request.method, str(response.status_code))
+    # Observed when the server closes the response, so streamed bodies are included.
+    response.call_on_close(lambda: metrics.observe("ml_request_seconds", time.perf_counter() - started, *labels))
+    if timing_requested():
+        parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in (g.get('timings') or {}).items()]
+        parts.append(f"total;dur={(time.perf_counter() - started) * 1000:.2f}")
+        response.headers['X-Timing'] = ', '.join(parts)
+    return response
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.getenv("MODEL_DIR") or os.path.join(BASE_DIR, 'model')
+MODEL_FILE = os.path.join(MODEL_DIR, 'BEST_MODEL.pkl')
+SCALER_FILE = os.path.join(MODEL_DIR, 'scaler.pkl')
+ENCODER_FILE = os.path.join(MODEL_DIR, 'onehot_encoder.pkl')
+FEATURE_NAMES_FILE = os.path.join(MODEL_DIR, 'feature_names.pkl')
+IQR_BOUNDS_NAME = 'iqr_bounds.json'
+IQR_BOUNDS_FILE = os.path.join(MODEL_DIR, IQR_BOUNDS_NAME)
+SEGMENTS_NAME = 'segments.json'
+SEGMENTS_FILE = os.path.join(MODEL_DIR, SEGMENTS_NAME)
+# Artifacts an older artifact set may lack: bounds fall back to IQR_BOUNDS, segments are skipped.
+OPTIONAL_ARTIFACT_FILES = [IQR_BOUNDS_NAME, SEGMENTS_NAME]
+
+# Fallback for artifact sets published before save_iqr_bounds.py wrote iqr_bounds.json.
 IQR_BOUNDS = {
     'age': {'lower': 18.0, 'upper': 70.0},
     'balance': {'lower': -2203.0, 'upper': 3954.0},
@@ -42,144 +149,762 @@ IQR_BOUNDS = {
 }
 
 HF_REPO_ID = os.getenv("HF_REPO_ID")
+LOCAL_ARTIFACT_DIR = os.getenv("LOCAL_ARTIFACT_DIR")
+ARTIFACT_FILES = ["BEST_MODEL.pkl", "scaler.pkl", "onehot_encoder.pkl"]
+# Served next to BEST_MODEL on the same preprocessed features; fetched and loaded on first request.
+EXTRA_MODELS = {"logreg": ("logreg.pkl", sklearn_scorer), "mlp": ("mlp.npz", dense_scorer)}
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "best").lower()
+CASCADE_MODEL = "cascade"
+CASCADE_FIRST = "logreg"
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.5"))
+CASCADE_BAND = float(os.getenv("CASCADE_BAND", "0.15"))
+PREDICT_CHUNK_ROWS = int(os.getenv("PREDICT_CHUNK_ROWS", "5000"))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(16 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "1024"))
+EXPLAIN_CACHE_MAX_BYTES = int(os.getenv("EXPLAIN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+EXPLAIN_CACHE_TTL = float(os.getenv("EXPLAIN_CACHE_TTL", "0"))
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "4096"))
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "0"))
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn").lower()
+# Batches larger than this go to the estimator's predict_proba even with the compiled backend.
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", "64"))
+SHAP_EXPLAINER = os.getenv("SHAP_EXPLAINER", "shap").lower()
+FAST_SHAP_MAX_SLOTS = int(os.getenv("FAST_SHAP_MAX_SLOTS", str(MAX_PATH_SLOTS)))
+SHAP_WARMUP = os.getenv("SHAP_WARMUP", "background").lower()
+SHARED_ARTIFACTS = os.getenv("SHARED_ARTIFACTS", "false").lower() in ("1", "true", "yes")
+SHARED_ARTIFACTS_DIR = os.getenv("SHARED_ARTIFACTS_DIR", os.path.join(MODEL_DIR, 'shared'))
+SHARED_CLASSES = (FeaturePipeline, CompiledTreeEnsemble, FastTreeSHAP)
+PREDICT_BATCHING = os.getenv("PREDICT_BATCHING", "false").lower() in ("1", "true", "yes")
+PREDICT_BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2"))
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "64"))
+BATCHING = {"max_wait_ms": PREDICT_BATCH_WINDOW_MS, "max_rows": PREDICT_BATCH_MAX_ROWS} if PREDICT_BATCHING else None
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", "0"))
+PARALLEL_SHARD_ROWS = int(os.getenv("PARALLEL_SHARD_ROWS", "20000"))
+PARALLEL_MIN_ROWS = int(os.getenv("PARALLEL_MIN_ROWS", "50000"))
+JOBS_DIR = os.getenv("JOBS_DIR") or os.path.join(BASE_DIR, 'jobs')
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "16"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_PAGE_ROWS = int(os.getenv("JOB_PAGE_ROWS", "1000"))
+WHAT_IF_MAX_POINTS = int(os.getenv("WHAT_IF_MAX_POINTS", "10000"))
+WHAT_IF_MAX_EXPLAIN = 20
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Shared by every worker on the host: a POST /admin/reload in one worker is picked up by the others from here.
+RELOAD_REQUEST_FILE = os.getenv("RELOAD_REQUEST_FILE") or os.path.join(MODEL_DIR, 'reload-request.json')
+RELOAD_POLL_INTERVAL = float(os.getenv("RELOAD_POLL_INTERVAL", "2"))
+
+prediction_cache = ResultCache(PREDICT_CACHE_SIZE, ttl=PREDICT_CACHE_TTL)
+shard_pool = ShardPool(PARALLEL_WORKERS, PARALLEL_SHARD_ROWS, PARALLEL_MIN_ROWS)
+active_bundle = None
+reload_lock = threading.Lock()
+reload_state = {"status": "idle"}
+reload_request_seen = None
+watcher_pid = None
+watcher_lock = threading.Lock()
+
+metrics = MetricsRegistry()
+metrics.histogram("ml_request_seconds", "Request latency, including streamed bodies.", ("endpoint", "method", "status"))
+metrics.histogram("ml_stage_seconds", "Time spent in each stage of a request or job chunk.", ("endpoint", "stage"))
+metrics.histogram("ml_request_rows", "Rows scored per request.", ("endpoint",), ROW_BUCKETS)
+
+def timing_requested():
+    return str(request.headers.get('X-Timing') or request.args.get('timing', '')).lower() in ('1', 'true', 'yes')
+
+@contextmanager
+def measure(stage, endpoint=None):
+    # Recorded under the current request's endpoint; X-Timing reports the per-stage totals.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        in_request = has_request_context()
+        endpoint = endpoint or (request.endpoint if in_request else None) or "background"
+        metrics.observe("ml_stage_seconds", seconds, endpoint, stage)
+        if in_request:
+            timings = g.get('timings')
+            if timings is None:
+                timings = g.timings = {}
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+def record_rows(n_rows, endpoint=None):
+    endpoint = endpoint or (request.endpoint if has_request_context() else None) or "background"
+    metrics.observe("ml_request_rows", n_rows, endpoint)
+
+@metrics.collector
+def service_gauges():
+    bundle = active_bundle
+    caches = [("predict", prediction_cache.stats())]
+    if bundle is not None and bundle.explainer_ready:
+        caches.append(("explain", bundle.explainer().cache.stats()))
+    yield ("ml_cache_hits_total", "counter", "Cache lookups answered from the cache.",
+           [({"cache": name}, stats["hits"]) for name, stats in caches])
+    yield ("ml_cache_misses_total", "counter", "Cache lookups that had to be computed.",
+           [({"cache": name}, stats["misses"]) for name, stats in caches])
+    yield ("ml_cache_entries", "gauge", "Entries currently cached.",
+           [({"cache": name}, stats["entries"]) for name, stats in caches])
+    yield ("ml_process_resident_memory_bytes", "gauge", "Resident set size.", [({}, resident_memory_bytes())])
+    yield ("ml_process_peak_resident_memory_bytes", "gauge", "Peak resident set size.",
+           [({}, peak_resident_memory_bytes())])
+    with artifact_status_lock:
+        stages = [({"stage": name}, entry.get("seconds")) for name, entry in artifact_status.items()]
+    yield ("ml_artifact_load_seconds", "gauge", "Duration of the last run of each artifact loading stage.", stages)
+    if bundle is not None:
+        yield ("ml_model_info", "gauge", "The model bundle being served.",
+               [({"version": bundle.version, "source": bundle.source}, 1)])
+
+# Scored (and explained) before a reloaded bundle is swapped in.
+CANARY_LEADS = [
+    {},
+    {'age': 45, 'balance': 2500, 'duration': 600, 'campaign': 2, 'pdays': 90, 'previous': 1, 'job': 'management',
+     'education': 'tertiary', 'housing': 'yes', 'contact': 'cellular', 'month': 'may', 'poutcome': 'success'},
+]
+
+startup_started = time.perf_counter()
+artifacts_ready = threading.Event()
+artifact_status = {}
+artifact_status_lock = threading.Lock()
+load_error = None
+
+def record_status(name, status, seconds=None, error=None):
+    with artifact_status_lock:
+        entry = {"status": status}
+        if seconds is not None:
+            entry["seconds"] = round(seconds, 4)
+        if error is not None:
+            entry["error"] = error
+        artifact_status[name] = entry
+
+def timed_stage(name, fn, *args):
+    record_status(name, "loading")
+    started = time.perf_counter()
+    try:
+        result = fn(*args)
+    except Exception as e:
+        record_status(name, "failed", time.perf_counter() - started, str(e))
+        raise
+    record_status(name, "ready", time.perf_counter() - started)
+    return result
+
+def configured_source():
+    if LOCAL_ARTIFACT_DIR:
+        return ArtifactSource(local_dir=LOCAL_ARTIFACT_DIR)
+    if HF_REPO_ID:
+        return ArtifactSource(repo_id=HF_REPO_ID)
+    return None
 
 def download_models_from_hf():
-    if not HF_REPO_ID:
+    source = configured_source()
+    if source is None:
         print("ℹ️ HF_REPO_ID not set. Skipping Hugging Face download.")
-        return
 
-    print(f"⬇️ Attempting to download models from Hugging Face repo: {HF_REPO_ID}")
-    files_to_download = ["BEST_MODEL.pkl", "scaler.pkl", "onehot_encoder.pkl"]
+    if source is not None:
+        print(f"⬇️ Syncing model artifacts from {source}")
+    try:
+        results = sync_artifacts(
+            source, MODEL_DIR, ARTIFACT_FILES,
+            on_file=lambda filename, sync: timed_stage(f"download:{filename}", sync, filename),
+        )
+    except ValueError as e:
+        print(f"❌ Artifact integrity check failed: {e}")
+        raise
+    for filename, action in results.items():
+        if action == "unverified":
+            print(f"   ⚠️ {filename} has no manifest entry; integrity not checked.")
+        elif action == "unchanged":
+            print(f"   ℹ️ {filename} has no manifest entry but matches the copy in {source}.")
+        elif action == "verified":
+            print(f"   ℹ️ {filename} matches the manifest.")
+        else:
+            print(f"   ✅ Fetched {filename} ({action})")
+
+    for filename in OPTIONAL_ARTIFACT_FILES if source is not None else []:
+        try:
+            sync_artifacts(source, MODEL_DIR, [filename])
+        except ValueError as e:
+            print(f"   ⚠️ {filename} not synced from {source} ({e})")
+
+def fetch_model_file(filename):
+    sync_artifacts(configured_source(), MODEL_DIR, [filename])
+    return os.path.join(MODEL_DIR, filename)
+
+def model_file_problem(filename):
+    """Why ``filename`` can be neither used from model/ nor fetched, or None if it can."""
+    manifest = read_manifest(os.path.join(MODEL_DIR, MANIFEST_NAME))
+    if manifest is not None and filename not in manifest:
+        return f"{filename} is not listed in {MANIFEST_NAME}"
+    source = configured_source()
+    if source is not None and (not source.local_dir or os.path.isfile(os.path.join(source.local_dir, filename))):
+        return None
+    path = os.path.join(MODEL_DIR, filename)
+    if not os.path.isfile(path):
+        where = f"in {source}" if source is not None else "and no artifact source (HF_REPO_ID) is set"
+        return f"{filename} is not in model/ {where}"
+    if is_lfs_pointer(path):
+        return f"{filename} is a Git LFS pointer; run `git lfs pull` or set HF_REPO_ID"
+    return None
+
+def extra_model_loaders():
+    """Loaders for the extra models whose artifacts are here or fetchable, and why the others are not."""
+    def loader(filename, build):
+        return lambda: timed_stage(f"model:{filename}", lambda: build(fetch_model_file(filename)))
+    loaders, unavailable = {}, {}
+    for name, (filename, build) in EXTRA_MODELS.items():
+        problem = model_file_problem(filename)
+        if problem is None:
+            loaders[name] = loader(filename, build)
+        else:
+            unavailable[name] = problem
+    return loaders, unavailable
 
-    os.makedirs(os.path.join(BASE_DIR, 'model'), exist_ok=True)
+def invalidate_caches():
+    prediction_cache.clear()
 
-    for filename in files_to_download:
-        destination = os.path.join(BASE_DIR, 'model', filename)
+def compile_model(model, n_features):
+    try:
+        compiled = compile_tree_model(model)
+        gap = verify_compiled(compiled, model, n_features)
+        if gap > PROBA_TOLERANCE:
+            raise ValueError(f"canary batch differs from predict_proba by {gap:.2e}")
+        print(f"   ✅ Compiled inference enabled ({len(compiled.roots)} trees, depth {compiled.depth}, max gap {gap:.1e})")
+        return compiled
+    except Exception as e:
+        print(f"   ⚠️ Compiled inference unavailable, using {type(model).__name__}.predict_proba: {e}")
+        return None
+
+def make_shap_service(bundle):
+    if bundle.model is None and bundle.shared_explainer is None:
+        return None
+    explain_cache = ResultCache(EXPLAIN_CACHE_SIZE, EXPLAIN_CACHE_MAX_BYTES, EXPLAIN_CACHE_TTL)
+    return timed_stage(
+        "shap", LeadScoringSHAPService, bundle.model, bundle.feature_names, bundle.version, explain_cache,
+        SHAP_EXPLAINER, bundle.compiled, bundle.shared_explainer, FAST_SHAP_MAX_SLOTS,
+    )
+
+def current_bundle():
+    """The active bundle, pinned for the rest of the request so a reload cannot swap it mid-way."""
+    bundle = active_bundle
+    if has_request_context():
+        g.bundle = bundle
+    return bundle
+
+def get_shap_service(bundle):
+    try:
+        return bundle.explainer()
+    except Exception as e:
+        print(f"❌ Failed to build SHAP explainer: {str(e)}")
+        return None
 
-        should_download = True
-        if os.path.exists(destination):
-            file_size = os.path.getsize(destination)
-            if file_size > 2048:
-                should_download = False
-                print(f"   ℹ️ {filename} exists and seems valid ({file_size} bytes).")
-            else:
-                print(f"   ⚠️ {filename} exists but is too small ({file_size} bytes). Re-downloading...")
+def warm_up_shap(bundle):
+    try:
+        bundle.explainer()
+    except Exception as e:
+        print(f"⚠️ SHAP warm-up failed, will retry on first /explain: {str(e)}")
 
-        if should_download:
-            try:
-                print(f"   Downloading {filename}...")
-                downloaded_path = hf_hub_download(repo_id=HF_REPO_ID, filename=filename)
-                import shutil
-                shutil.copy(downloaded_path, destination)
-                print(f"   ✅ Downloaded {filename} to {destination}")
-            except Exception as e:
-                print(f"   ❌ Failed to download {filename}: {e}")
+def schedule_explainer(bundle):
+    if SHAP_WARMUP == 'eager':
+        bundle.explainer()
+        return
+    record_status("shap", "pending")
+    if SHAP_WARMUP == 'background':
+        threading.Thread(target=warm_up_shap, args=(bundle,), name='shap-warmup', daemon=True).start()
+
+def unpickle_artifacts():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # Unpickling imports modules, and concurrent imports of the same package can
+        # deadlock. The scaler goes first so sklearn.preprocessing is fully imported;
+        # after that only the model thread still has new modules to import.
+        scaler = timed_stage("scaler", joblib.load, SCALER_FILE)
+        model_load = pool.submit(timed_stage, "model", joblib.load, MODEL_FILE)
+        encoder_load = pool.submit(timed_stage, "encoder", joblib.load, ENCODER_FILE)
+        return model_load.result(), scaler, encoder_load.result()
+
+def load_iqr_bounds():
+    """Clipping bounds from iqr_bounds.json, or the built-in IQR_BOUNDS; returns (bounds, info)."""
+    if not os.path.exists(IQR_BOUNDS_FILE):
+        print(f"   ⚠️ {IQR_BOUNDS_NAME} not found; clipping with the built-in IQR bounds.")
+        return IQR_BOUNDS, {"source": "builtin"}
+    bounds, artifact = read_bounds(IQR_BOUNDS_FILE)
+    info = {"source": IQR_BOUNDS_NAME, "version": artifact["version"], "created_at": artifact.get("created_at"),
+            "rows": artifact.get("rows"), "exact": artifact.get("exact")}
+    return bounds, info
+
+def load_segments():
+    if not os.path.exists(SEGMENTS_FILE):
+        print(f"   ⚠️ {SEGMENTS_NAME} not found; results will have no segment column "
+              f"(build it with save_segments.py and publish it with upload_to_hf.py).")
+        return None
+    return read_segments(SEGMENTS_FILE)
+
+def bundle_files():
+    # Everything that changes what a request returns; the bundle version hashes these.
+    optional = [path for path in (IQR_BOUNDS_FILE, SEGMENTS_FILE) if os.path.exists(path)]
+    return [MODEL_FILE, SCALER_FILE, ENCODER_FILE] + optional
+
+def resolve_feature_names(model, encoder):
+    if os.path.exists(FEATURE_NAMES_FILE):
+        return joblib.load(FEATURE_NAMES_FILE)
+    if hasattr(model, 'feature_names_in_'):
+        return list(model.feature_names_in_)
+    if hasattr(encoder, 'get_feature_names_out'):
+        encoded_categs = list(encoder.get_feature_names_out(CATEGORICAL_COLS))
+    else:
+        encoded_categs = list(encoder.get_feature_names(CATEGORICAL_COLS))
+    return NUMERIC_COLS + encoded_categs
+
+def shared_config(iqr_bounds):
+    # Everything that decides which components a shared bundle holds is part of its key.
+    fast_explainer = SHAP_EXPLAINER == 'fast' and SHAP_WARMUP != 'lazy'
+    return {"iqr_bounds": iqr_bounds, "compiled": INFERENCE_BACKEND == 'compiled',
+            "explainer": {"max_slots": FAST_SHAP_MAX_SLOTS} if fast_explainer else None}
+
+def publish_shared_bundle(key, config, model, pipeline, compiled, feature_names):
+    components = {"pipeline": pipeline}
+    if compiled is not None:
+        components["compiled"] = compiled
+    # Built here only when workers would build it anyway; SHAP_WARMUP=lazy leaves it to the first /explain.
+    if config["explainer"] is not None:
+        try:
+            components["explainer"] = FastTreeSHAP(compiled or compile_tree_model(model), len(feature_names),
+                                                   FAST_SHAP_MAX_SLOTS)
+        except (TypeError, ValueError) as e:
+            print(f"   ⚠️ Fast TreeSHAP not shared, workers will use shap.TreeExplainer: {e}")
+    export_bundle(
+        SHARED_ARTIFACTS_DIR, key, components,
+        extra={"feature_names": [str(f) for f in feature_names]},
+    )
+    # Re-open what was just written so this process maps the same pages as every other worker.
+    return load_bundle(SHARED_ARTIFACTS_DIR, key, SHARED_CLASSES)
 
 def load_artifacts():
-    global model, scaler, encoder, feature_names, shap_service
+    """Load the artifact set on disk into a new ModelBundle; the active bundle is left untouched."""
     try:
         if not os.path.exists(MODEL_FILE):
             raise FileNotFoundError(f"Model file not found at {MODEL_FILE}")
 
-        model = joblib.load(MODEL_FILE)
-        scaler = joblib.load(SCALER_FILE)
-        encoder = joblib.load(ENCODER_FILE)
-
-        if os.path.exists(FEATURE_NAMES_FILE):
-            feature_names = joblib.load(FEATURE_NAMES_FILE)
+        fingerprint = timed_stage("fingerprint", file_fingerprint, *bundle_files())
+        iqr_bounds, bounds_info = timed_stage("iqr_bounds", load_iqr_bounds)
+        segments = timed_stage("segments", load_segments)
+
+        shared = None
+        if SHARED_ARTIFACTS:
+            config = shared_config(iqr_bounds)
+            key = bundle_key(fingerprint, config)
+            shared = timed_stage("shared", load_bundle, SHARED_ARTIFACTS_DIR, key, SHARED_CLASSES)
+
+        if shared is None:
+            model, scaler, encoder = unpickle_artifacts()
+            feature_names = resolve_feature_names(model, encoder)
+
+            model_features = list(model.feature_names_in_) if hasattr(model, 'feature_names_in_') else None
+            pipeline = timed_stage("pipeline", FeaturePipeline, encoder, scaler, iqr_bounds, model_features)
+            compiled = None
+            if INFERENCE_BACKEND == 'compiled':
+                compiled = timed_stage("compiled", compile_model, model, pipeline.n_features)
+            if SHARED_ARTIFACTS:
+                shared = timed_stage(
+                    "shared", publish_shared_bundle, key, config, model, pipeline, compiled, feature_names,
+                )
         else:
-            if hasattr(model, 'feature_names_in_'):
-                feature_names = list(model.feature_names_in_)
-            else:
-                numeric_cols = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
-                categorical_cols = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
-                if hasattr(encoder, 'get_feature_names_out'):
-                    encoded_categs = list(encoder.get_feature_names_out(categorical_cols))
-                else:
-                    encoded_categs = list(encoder.get_feature_names(categorical_cols))
-                feature_names = numeric_cols + encoded_categs
-
-        if model is not None and feature_names:
-            shap_service = LeadScoringSHAPService(model, feature_names)
+            # The estimator is still loaded: large batches score with predict_proba and
+            # shap.TreeExplainer needs it. The pipeline and compiled arrays are mapped.
+            model = timed_stage("model", joblib.load, MODEL_FILE)
+            feature_names = shared["extra"]["feature_names"]
+
+        source, shared_explainer = "pickle", None
+        if shared is not None:
+            pipeline, compiled, shared_explainer = shared["pipeline"], shared.get("compiled"), shared.get("explainer")
+            source = "shared"
+            print(f"   ✅ Mapped shared artifacts from {shared['directory']} "
+                  f"({bundle_nbytes(shared) / 1024 / 1024:.1f} MiB)")
+
+        model_loaders, unavailable_models = extra_model_loaders()
+        return ModelBundle(
+            fingerprint, pipeline, feature_names, model=model, compiled=compiled,
+            shared_explainer=shared_explainer, source=source,
+            explainer_factory=make_shap_service, batching=BATCHING, model_loaders=model_loaders,
+            bounds_info=bounds_info, segments=segments, compiled_max_rows=COMPILED_MAX_ROWS,
+            unavailable_models=unavailable_models,
+        )
 
     except Exception as e:
         print(f"❌ Failed to load artifacts: {str(e)}")
-        sys.exit(1)
-
-download_models_from_hf()
-load_artifacts()
-
-def process_csv_logic(csv_path, limit=None):
+        raise
+
+def install_bundle(bundle):
+    global active_bundle
+    previous = active_bundle
+    active_bundle = bundle
+    invalidate_caches()
+    if previous is not None:
+        previous.close()
+    artifacts_ready.set()
+
+def warm_bundle(bundle):
+    """Score, and unless SHAP_WARMUP=lazy explain, a canary batch; raises if the bundle is unusable."""
+    rows = [parse_explain_payload(lead) for lead in CANARY_LEADS]
+    X = bundle.pipeline.transform_records(rows)
+    scores = np.asarray(bundle.score_matrix(X), dtype=float)
+    if scores.shape != (len(rows),) or not np.all(np.isfinite(scores)) or scores.min() < 0 or scores.max() > 1:
+        raise ValueError(f"canary batch produced invalid scores: {scores.tolist()}")
+    if SHAP_WARMUP != 'lazy':
+        explainer = bundle.explainer()
+        if explainer is not None:
+            explainer.explain_many(X, rows)
+    return scores
+
+def reload_artifacts(trigger, force=False):
+    """Build, warm and swap in a new bundle; False if a reload is already running."""
+    global reload_state
+    if not reload_lock.acquire(blocking=False):
+        return False
+    started = time.perf_counter()
+    previous = active_bundle.version if active_bundle is not None else None
+    reload_state = {"status": "running", "trigger": trigger, "started_at": time.time()}
     try:
-        nrows = int(limit) if limit else None
-        df = pd.read_csv(csv_path, sep=None, engine='python', nrows=nrows)
-        df.columns = [c.lower().strip() for c in df.columns]
+        download_models_from_hf()
+        bundle = load_artifacts()
+        if bundle.version == previous and not force:
+            bundle.close()
+            status = "unchanged"
+        else:
+            warm_bundle(bundle)
+            install_bundle(bundle)
+            status = "swapped"
+            print(f"✅ Model bundle {previous} -> {bundle.version} ({trigger}) "
+                  f"in {time.perf_counter() - started:.2f}s")
+        reload_state = {"status": status, "trigger": trigger, "version": bundle.version,
+                        "previous_version": previous, "seconds": round(time.perf_counter() - started, 3)}
     except Exception as e:
-        return {"error": f"Failed to read CSV: {str(e)}"}
+        print(f"❌ Reload failed, still serving {previous}: {str(e)}")
+        reload_state = {"status": "failed", "trigger": trigger, "error": str(e), "version": previous,
+                        "seconds": round(time.perf_counter() - started, 3)}
+    finally:
+        reload_lock.release()
+    return True
+
+def artifact_signature():
+    signature = []
+    for path in (MODEL_FILE, SCALER_FILE, ENCODER_FILE, IQR_BOUNDS_FILE, SEGMENTS_FILE):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return signature
+
+def watch_artifacts():
+    seen = artifact_signature()
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        changed = artifact_signature()
+        if changed == seen:
+            continue
+        # Let the files sit unchanged for one more interval so a copy in progress is not loaded.
+        time.sleep(MODEL_WATCH_INTERVAL)
+        if artifact_signature() != changed:
+            continue
+        seen = changed
+        reload_artifacts("watcher")
+
+def read_reload_request():
+    try:
+        with open(RELOAD_REQUEST_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def broadcast_reload(force):
+    """Record a reload request for every worker; the caller reloads its own process."""
+    global reload_request_seen
+    request_id = uuid.uuid4().hex
+    reload_request_seen = request_id
+    tmp = f"{RELOAD_REQUEST_FILE}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump({"id": request_id, "force": force, "requested_at": time.time(), "pid": os.getpid()}, f)
+    os.replace(tmp, RELOAD_REQUEST_FILE)
+    return request_id
+
+def follow_reload_requests():
+    global reload_request_seen
+    if reload_request_seen is None:
+        # A request made before this process started is already reflected in what it loaded.
+        reload_request_seen = (read_reload_request() or {}).get("id")
+    while True:
+        time.sleep(RELOAD_POLL_INTERVAL)
+        pending = read_reload_request()
+        if pending is None or pending.get("id") == reload_request_seen:
+            continue
+        # While this worker is busy with another reload, the request is retried on the next poll.
+        if reload_artifacts("admin", bool(pending.get("force"))):
+            reload_request_seen = pending["id"]
+
+def start_watcher():
+    # Once per serving process, and never in a gunicorn --preload master, which only forks workers.
+    global watcher_pid
+    with watcher_lock:
+        if watcher_pid == os.getpid():
+            return
+        watcher_pid = os.getpid()
+    threading.Thread(target=follow_reload_requests, name='reload-follower', daemon=True).start()
+    if MODEL_WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_artifacts, name='artifact-watcher', daemon=True).start()
+
+def start_up():
+    global load_error
+    try:
+        download_models_from_hf()
+        bundle = load_artifacts()
+        install_bundle(bundle)
+        schedule_explainer(bundle)
+        print(f"✅ ML API ready in {time.perf_counter() - startup_started:.2f}s (model {bundle.version})")
+    except Exception as e:
+        load_error = str(e)
+        if threading.current_thread() is threading.main_thread():
+            sys.exit(1)
+
+def job_scorer(options):
+    # One bundle per run: a reload mid-job does not mix models within a run.
+    bundle = current_bundle()
+    model_name = options.get("model") or "best"
+
+    def score(chunk):
+        missing = [c for c in INPUT_FIELDS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        with measure("transform", "jobs"):
+            X_processed = bundle.pipeline.transform_frame(chunk)
+        with measure("predict", "jobs"):
+            chunk['ml_score'], scored_by = score_with(bundle, model_name, X_processed)
+        if scored_by is not None:
+            chunk['ml_model'] = scored_by
+        add_segments(bundle, chunk, "jobs")
+        return chunk
+
+    return bundle.version, score
+
+jobs = JobManager(JOBS_DIR, job_scorer, JOB_WORKERS, PREDICT_CHUNK_ROWS, JOB_MAX_PENDING, JOB_RETENTION_HOURS)
+
+def reset_after_fork():
+    # Threads do not survive fork: a gunicorn worker forked from a preloaded master
+    # needs its own dispatcher and watcher, and builds the explainer itself if warm-up was cut short.
+    global reload_lock, watcher_lock
+    if forked_pool_worker():
+        return
+    reload_lock = threading.Lock()
+    watcher_lock = threading.Lock()
+    jobs.after_fork()
+    shard_pool.after_fork()
+    metrics.after_fork()
+    bundle = active_bundle
+    # Still single-threaded here, so this is where the scoring pool is forked.
+    start_shard_pool(bundle)
+    if bundle is not None:
+        bundle.after_fork()
+        if not bundle.explainer_ready and SHAP_WARMUP == 'background':
+            record_status("shap", "pending")
+            threading.Thread(target=warm_up_shap, args=(bundle,), name='shap-warmup', daemon=True).start()
+    start_watcher()
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+# Under gunicorn --preload everything must be loaded before workers fork; the dev
+# server starts loading in the background so /live answers immediately. Watchers
+# start in each worker (reset_after_fork or its first request), not in the master.
+if __name__ != '__main__':
+    start_up()
+
+def score_with(bundle, model_name, X):
+    """Scores from ``model_name``; in cascade mode also the model that scored each row."""
+    if model_name != CASCADE_MODEL:
+        return np.asarray(bundle.scorer(model_name)(X), dtype=float), None
+    scores, escalated = cascade_scores(
+        X, bundle.scorer(CASCADE_FIRST), bundle.score_rows, CASCADE_THRESHOLD, CASCADE_BAND,
+    )
+    return scores, np.where(escalated, "best", CASCADE_FIRST)
+
+def cached_scores(bundle, X, model_name="best"):
+    if not prediction_cache.enabled:
+        return score_with(bundle, model_name, X)[0]
+
+    keys = [vector_key(row, f"{bundle.version}/{model_name}") for row in X]
+    scores = np.empty(len(X))
+    pending = []
+    for i, key in enumerate(keys):
+        hit = prediction_cache.get(key)
+        if hit is None:
+            pending.append(i)
+        else:
+            scores[i] = hit
 
-    numeric_features_model_order = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
-    numeric_features_scaler_order = ["age", "balance", "campaign", "pdays", "previous", "day", "duration"]
-    categorical_cols = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
+    if pending:
+        for i, score in zip(pending, score_with(bundle, model_name, X[pending])[0]):
+            scores[i] = score
+            prediction_cache.put(keys[i], float(score))
 
-    all_expected = numeric_features_model_order + categorical_cols
-    missing = [c for c in all_expected if c not in df.columns]
-    if missing:
-        return {"error": f"Missing required columns: {missing}"}
+    return scores
 
-    X_raw = df[all_expected].copy()
-    X_raw = X_raw.replace('unknown', np.nan).replace('Unknown', np.nan)
+def add_segments(bundle, df, endpoint=None):
+    # Uploads that already carry a segment column keep it.
+    if bundle.segments is not None and 'segment' not in df.columns:
+        with measure("segment", endpoint):
+            df['segment'] = bundle.segments.assign_frame(df)
 
-    for col in numeric_features_model_order:
-        if col == 'pdays':
-            X_raw[col] = X_raw[col].fillna(-1)
-        else:
-            X_raw[col] = X_raw[col].fillna(0)
-    for col in categorical_cols:
-        X_raw[col] = X_raw[col].fillna('unknown')
+def score_shard(bundle, columns, start, end, model_name):
+    return score_with(bundle, model_name, bundle.pipeline.transform_columns(columns.slice(start, end)))
 
-    if "pdays" in X_raw.columns:
-        X_raw["pdays"] = X_raw["pdays"].replace(999, -1)
+def shard_worker_bundle():
+    # A pool worker forked before the last reload builds the current bundle from the synced files.
+    bundle = load_artifacts()
+    bundle.close()
+    bundle.prepare_worker()
+    return bundle
 
-    for col in numeric_features_model_order:
-        if col in IQR_BOUNDS:
-            lower = IQR_BOUNDS[col]['lower']
-            upper = IQR_BOUNDS[col]['upper']
-            X_raw[col] = np.where(X_raw[col] < lower, lower,
-                         np.where(X_raw[col] > upper, upper, X_raw[col]))
+def start_shard_pool(bundle):
+    if PARALLEL_WORKERS > 1:
+        shard_pool.start(bundle, score_shard, shard_worker_bundle)
 
+def score_sharded(bundle, df, model_name, shard_rows=None):
+    columns = SharedColumns(df, bundle.pipeline.fields, UPLOAD_SPOOL_DIR)
     try:
-        encoded_arr = encoder.transform(X_raw[categorical_cols])
-        encoded_cols = encoder.get_feature_names_out(categorical_cols)
-        df_encoded = pd.DataFrame(encoded_arr, columns=encoded_cols, index=X_raw.index)
-    except Exception as e:
-        return {"error": f"Encoding error: {str(e)}"}
-
+        shards = [(columns, start, end, model_name) for start, end in shard_pool.shards(len(df), shard_rows)]
+        results = shard_pool.map(bundle.version, shards)
+    except StaleOwner as e:
+        # The request holds a bundle a reload has since replaced; the workers only have the new one.
+        print(f"   ℹ️ Scoring in-process: {e}")
+        return score_with(bundle, model_name, bundle.pipeline.transform_frame(df))
+    finally:
+        columns.close()
+    scored_by = [by for _, by in results]
+    return np.concatenate([scores for scores, _ in results]), None if scored_by[0] is None else np.concatenate(scored_by)
+
+def process_csv_logic(source, limit=None, bundle=None, model_name="best", shard_rows=None):
+    bundle = bundle or current_bundle()
     try:
-        X_processed = pd.concat([X_raw[numeric_features_model_order], df_encoded], axis=1)
-        X_processed[numeric_features_scaler_order] = scaler.transform(X_processed[numeric_features_scaler_order])
+        nrows = int(limit) if limit else None
+        with measure("read_csv"):
+            df = read_csv(source, nrows)
     except Exception as e:
-        return {"error": f"Scaling error: {str(e)}"}
+        return {"error": f"Failed to read CSV: {str(e)}"}
 
-    try:
-        if hasattr(model, "feature_names_in_"):
-            X_processed = X_processed[model.feature_names_in_]
-        else:
-            X_processed = X_processed.values
+    missing = [c for c in INPUT_FIELDS if c not in df.columns]
+    if missing:
+        return {"error": f"Missing required columns: {missing}"}
 
-        if hasattr(model, "predict_proba"):
-            predictions = model.predict_proba(X_processed)[:, 1]
-        else:
-            predictions = model.predict(X_processed)
+    if shard_pool.should_split(len(df)):
+        # Each worker encodes and scores its own shard; results come back in input order.
+        try:
+            with measure("score_shards"):
+                predictions, scored_by = score_sharded(bundle, df, model_name, shard_rows)
+        except Exception as e:
+            return {"error": f"Prediction error: {str(e)}"}
+    else:
+        try:
+            with measure("transform"):
+                X_processed = bundle.pipeline.transform_frame(df)
+        except Exception as e:
+            return {"error": f"Encoding error: {str(e)}"}
+
+        try:
+            with measure("predict"):
+                predictions, scored_by = score_with(bundle, model_name, X_processed)
+        except Exception as e:
+            return {"error": f"Prediction error: {str(e)}"}
+
+    df['ml_score'] = predictions
+    if scored_by is not None:
+        df['ml_model'] = scored_by
+    add_segments(bundle, df)
+    record_rows(len(df))
+    return df
+
+def result_response(result, output_format='json'):
+    if isinstance(result, dict) and "error" in result:
+        return jsonify(result), 500
+    with measure("serialize"):
+        body = serialize_frame(result, output_format)
+    return Response(body, mimetype=RESULT_MIMETYPES[output_format])
+
+def stream_csv_logic(source, limit=None, chunk_rows=None, output_format='ndjson', cleanup=None, model_name="best"):
+    bundle = current_bundle()
+    try:
+        nrows = int(limit) if limit else None
+        chunks = read_csv_chunks(source, int(chunk_rows) if chunk_rows else PREDICT_CHUNK_ROWS, nrows)
+        with measure("read_csv"):
+            first = next(chunks, None)
     except Exception as e:
-        return {"error": f"Prediction error: {str(e)}"}
+        return {"error": f"Failed to read CSV: {str(e)}"}
 
-    results = []
-    for i, score in enumerate(predictions):
-        row_data = df.iloc[i].to_dict()
-        clean_row = {k: (v if pd.notna(v) else None) for k, v in row_data.items()}
-        results.append({**clean_row, "ml_score": float(score)})
+    if first is not None:
+        missing = [c for c in INPUT_FIELDS if c not in first.columns]
+        if missing:
+            return {"error": f"Missing required columns: {missing}"}
+
+    def generate():
+        rows = 0
+        try:
+            header = True
+            for chunk in itertools.chain([first] if first is not None else [], chunks):
+                with measure("transform"):
+                    X_processed = bundle.pipeline.transform_frame(chunk)
+                with measure("predict"):
+                    chunk['ml_score'], scored_by = score_with(bundle, model_name, X_processed)
+                if scored_by is not None:
+                    chunk['ml_model'] = scored_by
+                add_segments(bundle, chunk)
+                with measure("serialize"):
+                    body = serialize_frame(chunk, output_format, header=header)
+                rows += len(chunk)
+                yield body
+                header = False
+        except Exception as e:
+            print(f"❌ Streaming prediction failed: {e}")
+            if output_format != 'csv':
+                yield json.dumps({"error": f"Prediction error: {str(e)}"}) + "\n"
+        finally:
+            chunks.close()
+            record_rows(rows)
+            if cleanup:
+                cleanup()
+
+    return Response(stream_with_context(generate()), mimetype=RESULT_MIMETYPES[output_format])
+
+def wants_stream(options):
+    return str(options.get('stream', '')).lower() in ('1', 'true', 'yes')
+
+def csv_response(source, options, cleanup=None):
+    streaming = wants_stream(options)
+    output_format = options.get('format') or ('ndjson' if streaming else 'json')
+    format_error, error_status = check_format(output_format, streaming), 400
+    if not format_error:
+        try:
+            model_name = parse_model(current_bundle(), options)
+        except ValueError as e:
+            format_error = str(e)
+        except ModelUnavailable as e:
+            format_error, error_status = str(e), 503
+
+    if format_error:
+        result, status = {"error": format_error}, error_status
+    elif streaming:
+        result = stream_csv_logic(source, options.get('limit'), options.get('chunk_size'), output_format, cleanup,
+                                  model_name)
+        if not isinstance(result, dict):
+            return result
+        status = 500
+    else:
+        result = process_csv_logic(source, options.get('limit'), model_name=model_name,
+                                   shard_rows=options.get('shard_rows'))
+        if cleanup:
+            cleanup()
+        return result_response(result, output_format)
 
-    return results
+    if cleanup:
+        cleanup()
+    return jsonify(result), status
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -190,7 +915,7 @@ def predict():
         data = request.get_json(silent=True)
         if data and 'file_path' in data:
             if os.path.exists(data['file_path']):
-                return process_csv_logic(data['file_path'], data.get('limit'))
+                return csv_response(data['file_path'], data)
             else:
                 return jsonify({"error": "File path not found"}), 404
 
@@ -198,22 +923,132 @@ def predict():
         return jsonify({"error": "No file provided"}), 400
 
     try:
-        temp_filename = f"temp_upload_{os.getpid()}.csv"
-        temp_path = os.path.join(BASE_DIR, temp_filename)
-        file_obj.save(temp_path)
+        # Parsed straight from the spooled upload; nothing is written under BASE_DIR. The
+        # stream is taken over from the request, which closes its files as soon as the
+        # view returns, before a streamed response has been read.
+        upload, file_obj.stream = file_obj.stream, io.BytesIO()
+        return csv_response(upload, request.form, upload.close)
+
+    except Exception as e:
+        return jsonify({"error": f"Failed to process upload: {str(e)}"}), 500
 
-        limit = request.form.get('limit')
-        result = process_csv_logic(temp_path, limit)
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    upload = request.files.get('file')
+    if upload is not None:
+        options, input_path = request.form, None
+    else:
+        options = request.get_json(silent=True) or {}
+        input_path = options.get('file_path')
+        if not input_path:
+            return jsonify({"error": "No file provided", "success": False}), 400
+        if not os.path.exists(input_path):
+            return jsonify({"error": "File path not found", "success": False}), 404
 
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+    try:
+        job_options = {
+            "model": parse_model(current_bundle(), options),
+            "limit": int(options['limit']) if options.get('limit') else None,
+            "chunk_rows": int(options['chunk_size']) if options.get('chunk_size') else None,
+        }
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+
+    try:
+        job = jobs.submit(job_options, upload=upload, input_path=input_path)
+    except OverflowError as e:
+        return jsonify({"error": str(e), "success": False}), 429
+    return jsonify({"success": True, **job}), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    jobs.resume_orphans()
+    return jsonify({"jobs": [jobs.describe(job) for job in jobs.list()]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.status(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "success": False}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    job = jobs.delete(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "success": False}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    output_format = request.args.get('format', 'json')
+    format_error = check_format(output_format)
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', JOB_PAGE_ROWS))
+    except ValueError:
+        format_error = "offset and limit must be integers"
+    if format_error:
+        return jsonify({"error": format_error, "success": False}), 400
+
+    job = jobs.status(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "success": False}), 404
+    page, next_offset = jobs.results(job_id, max(offset, 0), max(limit, 1))
+    response = Response(serialize_frame(page, output_format), mimetype=RESULT_MIMETYPES[output_format])
+    response.headers['X-Job-Status'] = job["status"]
+    response.headers['X-Next-Offset'] = '' if next_offset is None else str(next_offset)
+    return response
+
+@app.route('/predict_columnar', methods=['POST'])
+def predict_columnar():
+    input_format = columnar_format(request.content_type)
+    if input_format is None:
+        return jsonify({
+            "error": f"Send an Arrow IPC stream or .npz body ({', '.join(COLUMNAR_MIMETYPES.values())})",
+            "success": False,
+        }), 415
+    output_format = request.args.get('format', input_format)
+    if output_format not in COLUMNAR_MIMETYPES:
+        return jsonify({"error": f"Unsupported format: {output_format}", "success": False}), 400
+    if 'arrow' in (input_format, output_format) and not arrow_available():
+        return jsonify({"error": "Arrow format requires pyarrow to be installed", "success": False}), 415
+
+    bundle = current_bundle()
+    try:
+        model_name = parse_model(bundle, {})
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+    try:
+        with measure("decode"):
+            columns = decode_columns(request.get_data(cache=False), input_format)
+    except Exception as e:
+        return jsonify({"error": f"Invalid columnar body: {str(e)}", "success": False}), 400
 
-        if isinstance(result, dict) and "error" in result:
-            return jsonify(result), 500
-        return jsonify(result)
+    missing = [c for c in INPUT_FIELDS if c not in columns]
+    if missing:
+        return jsonify({"error": f"Missing required columns: {missing}", "success": False}), 400
+    if len({len(columns[c]) for c in INPUT_FIELDS}) > 1:
+        return jsonify({"error": "Columns must all have the same length", "success": False}), 400
 
+    try:
+        with measure("transform"):
+            X_processed = bundle.pipeline.transform_columns(columns)
+        with measure("predict"):
+            scores, scored_by = score_with(bundle, model_name, X_processed)
     except Exception as e:
-        return jsonify({"error": f"Failed to process upload: {str(e)}"}), 500
+        return jsonify({"error": f"Prediction error: {str(e)}", "success": False}), 500
+
+    result = {"ml_score": np.asarray(scores, dtype=np.float64)}
+    if scored_by is not None:
+        result["ml_model"] = scored_by
+    if bundle.segments is not None and 'segment' not in columns:
+        with measure("segment"):
+            result["segment"] = bundle.segments.assign_columns(columns)
+    record_rows(len(result["ml_score"]))
+    with measure("serialize"):
+        body = encode_columns(result, output_format)
+    return Response(body, mimetype=COLUMNAR_MIMETYPES[output_format])
 
 @app.route('/predict_single', methods=['POST'])
 def predict_single():
@@ -221,6 +1056,12 @@ def predict_single():
     if not data:
         return jsonify({"error": "No data provided"}), 400
 
+    bundle = current_bundle()
+    try:
+        model_name = parse_model(bundle, data)
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+
     try:
         single_data = {
             'age': int(data.get('age', 30)),
@@ -241,57 +1082,208 @@ def predict_single():
             'poutcome': str(data.get('poutcome', 0)),
         }
 
-        df = pd.DataFrame([single_data])
-
-        numeric_features_model_order = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
-        numeric_features_scaler_order = ["age", "balance", "campaign", "pdays", "previous", "day", "duration"]
-        categorical_cols = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
-
-        X_raw = df[numeric_features_model_order + categorical_cols].copy()
-        X_raw = X_raw.replace('unknown', np.nan).replace('Unknown', np.nan)
-
-        for col in numeric_features_model_order:
-            if col == 'pdays':
-                X_raw[col] = X_raw[col].fillna(-1)
-            else:
-                X_raw[col] = X_raw[col].fillna(0)
-        for col in categorical_cols:
-            X_raw[col] = X_raw[col].fillna('unknown')
-
-        if "pdays" in X_raw.columns:
-            X_raw["pdays"] = X_raw["pdays"].replace(999, -1)
+        with measure("transform"):
+            X_processed = bundle.pipeline.transform_records([single_data])
+        with measure("predict"):
+            prediction = cached_scores(bundle, X_processed, model_name)[0]
 
-        for col in numeric_features_model_order:
-            if col in IQR_BOUNDS:
-                lower = IQR_BOUNDS[col]['lower']
-                upper = IQR_BOUNDS[col]['upper']
-                X_raw[col] = np.where(X_raw[col] < lower, lower,
-                             np.where(X_raw[col] > upper, upper, X_raw[col]))
-
-        encoded_arr = encoder.transform(X_raw[categorical_cols])
-        encoded_cols = encoder.get_feature_names_out(categorical_cols)
-        df_encoded = pd.DataFrame(encoded_arr, columns=encoded_cols, index=X_raw.index)
-
-        X_processed = pd.concat([X_raw[numeric_features_model_order], df_encoded], axis=1)
-        X_processed[numeric_features_scaler_order] = scaler.transform(X_processed[numeric_features_scaler_order])
-
-        if hasattr(model, "feature_names_in_"):
-            X_processed = X_processed[model.feature_names_in_]
-
-        if hasattr(model, "predict_proba"):
-            prediction = model.predict_proba(X_processed)[0, 1]
-        else:
-            prediction = model.predict(X_processed)[0]
-
-        return jsonify({"prediction": float(prediction), "success": True})
+        body = {"prediction": float(prediction), "success": True, "model": model_name, "model_version": bundle.version}
+        if bundle.segments is not None:
+            body["segment"] = str(bundle.segments.assign_columns({k: [v] for k, v in single_data.items()})[0])
+        with measure("serialize"):
+            return jsonify(body)
 
     except Exception as e:
         return jsonify({"error": f"Prediction failed: {str(e)}", "success": False}), 500
 
+def ready_explainer():
+    bundle = current_bundle()
+    return bundle.explainer() if bundle.explainer_ready else None
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    shap_service = ready_explainer()
+    return jsonify({
+        "predict": prediction_cache.stats(),
+        "explain": shap_service.cache.stats() if shap_service is not None else None,
+    })
+
+@app.route('/explainer/stats', methods=['GET'])
+def explainer_stats():
+    shap_service = ready_explainer()
+    if shap_service is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **shap_service.stats()})
+
+@app.route('/batcher/stats', methods=['GET'])
+def batcher_stats():
+    batcher = current_bundle().batcher
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **batcher.stats()})
+
+def admin_authorized():
+    token = request.headers.get('X-Admin-Token') or ''
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    # Closed unless ADMIN_TOKEN is set.
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled; set ADMIN_TOKEN to enable them", "success": False}), 403
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden", "success": False}), 403
+    if request.method == 'GET':
+        return jsonify({"bundle": current_bundle().describe(), "reload": reload_state, "pid": os.getpid(),
+                        "last_request": read_reload_request()})
+
+    force = str(request.args.get('force', '')).lower() in ('1', 'true', 'yes')
+    if reload_lock.locked():
+        return jsonify({"error": "Reload already in progress", "success": False}), 409
+    # The other workers follow RELOAD_REQUEST_FILE and reload within RELOAD_POLL_INTERVAL.
+    request_id = broadcast_reload(force)
+    scope = {"request_id": request_id, "pid": os.getpid(), "broadcast": True,
+             "poll_interval_seconds": RELOAD_POLL_INTERVAL}
+    if str(request.args.get('wait', '')).lower() in ('1', 'true', 'yes'):
+        if not reload_artifacts("admin", force):
+            return jsonify({"error": "Reload already in progress", "success": False, **scope}), 409
+        state = dict(reload_state)
+        return jsonify({"success": state["status"] != "failed", **state, **scope}), \
+            500 if state["status"] == "failed" else 200
+
+    threading.Thread(target=reload_artifacts, args=("admin", force), name='artifact-reload', daemon=True).start()
+    return jsonify({"success": True, "status": "accepted", "version": current_bundle().version, **scope}), 202
+
+def parse_explain_payload(data):
+    return {
+        'age': int(data.get('age', 30)),
+        'balance': int(data.get('balance', 0)),
+        'day': int(data.get('day', 1)),
+        'duration': int(data.get('duration', 0)),
+        'campaign': int(data.get('campaign', 0)),
+        'pdays': int(data.get('pdays', 999)),
+        'previous': int(data.get('previous', 0)),
+        'job': str(data.get('job', 'unknown')),
+        'marital': str(data.get('marital', 'unknown')),
+        'education': str(data.get('education', 'unknown')),
+        'default': str(data.get('default', 'no')),
+        'housing': str(data.get('housing', 'no')),
+        'loan': str(data.get('loan', 'no')),
+        'contact': str(data.get('contact', 'unknown')),
+        'month': str(data.get('month', 'jan')),
+        'poutcome': str(data.get('poutcome', 'unknown')),
+    }
+
+def parse_model(bundle, data):
+    """The requested model name; raises ValueError if unknown, ModelUnavailable (503) if it cannot be loaded."""
+    model_name = request.args.get('model') or (data.get('model') if hasattr(data, 'get') else None) or DEFAULT_MODEL
+    names = bundle.model_names()
+    choices = names + ([CASCADE_MODEL] if CASCADE_FIRST in names else [])
+    if model_name == CASCADE_MODEL and CASCADE_FIRST in bundle.registry.unavailable:
+        raise ModelUnavailable(f"Model '{CASCADE_MODEL}' needs '{CASCADE_FIRST}', which is not available: "
+                               f"{bundle.registry.unavailable[CASCADE_FIRST]}")
+    if model_name not in choices and model_name not in bundle.registry.unavailable:
+        raise ValueError(f"Unknown model '{model_name}'. Use one of: {', '.join(choices)}")
+    # Loaded here, before any work starts, so a model that cannot be loaded is a 503 rather than a failed scoring run.
+    required = CASCADE_FIRST if model_name == CASCADE_MODEL else model_name
+    if required != "best":
+        bundle.scorer(required)
+    return model_name
+
+def require_explainable(data):
+    # The explainer is built for BEST_MODEL; attributions for another model would be misleading.
+    if (request.args.get('model') or data.get('model') or "best") != "best":
+        raise ValueError("Explanations are only available for model 'best'")
+
+def parse_aggregate(data):
+    aggregate = request.args.get('aggregate') or (data.get('aggregate') if isinstance(data, dict) else None)
+    if aggregate is not None and aggregate not in AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregate '{aggregate}'. Use one of: {', '.join(AGGREGATIONS)}")
+    return aggregate
+
+def sweep_value(field, value):
+    # Checked here because the pipeline would score an unreadable number as the missing-value fill.
+    if field in NUMERIC_COLS:
+        number = None
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            try:
+                number = float(value)
+            except ValueError:
+                pass
+        if number is None or not np.isfinite(number):
+            raise ValueError(f"Value {value!r} for '{field}' is not a number")
+        return int(number) if number.is_integer() else number
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"Value {value!r} for '{field}' is not a category name")
+    return value
+
+def sweep_values(pipeline, field, spec):
+    if spec == "all":
+        if field not in CATEGORICAL_COLS:
+            raise ValueError(f"'all' only applies to categorical features, not '{field}'")
+        return pipeline.categories(field)
+    if isinstance(spec, dict):
+        if field not in NUMERIC_COLS:
+            raise ValueError(f"Ranges only apply to numeric features, not '{field}'")
+        try:
+            start, stop, step = float(spec['start']), float(spec['stop']), float(spec.get('step', 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Range for '{field}' needs numeric 'start', 'stop' and optional 'step'")
+        if step <= 0 or stop < start:
+            raise ValueError(f"Range for '{field}' needs start <= stop and a positive step")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > WHAT_IF_MAX_POINTS:
+            raise ValueError(f"Range for '{field}' has {count} points (limit {WHAT_IF_MAX_POINTS})")
+        values = start + step * np.arange(count)
+        # Ranges are inclusive of stop, like "duration 0..900 step 30".
+        return [int(v) for v in values] if all(float(x).is_integer() for x in (start, step)) else values.tolist()
+    if isinstance(spec, list) and spec:
+        return [sweep_value(field, value) for value in spec]
+    raise ValueError(f"Sweep for '{field}' must be a non-empty list, a {{start, stop, step}} range or \"all\"")
+
+def parse_sweeps(pipeline, data):
+    spec = data.get('sweep')
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("Provide 'sweep' as {feature: values}")
+    sweeps = []
+    for field, values in spec.items():
+        field = str(field).lower().strip()
+        if field not in INPUT_FIELDS:
+            raise ValueError(f"Unknown feature '{field}'. Use one of: {', '.join(INPUT_FIELDS)}")
+        sweeps.append((field, sweep_values(pipeline, field, values)))
+    points = int(np.prod([len(values) for _, values in sweeps]))
+    if points > WHAT_IF_MAX_POINTS:
+        raise ValueError(f"Sweep has {points} points (limit {WHAT_IF_MAX_POINTS})")
+    return sweeps
+
+def parse_top_k(data):
+    try:
+        top_k = int(data.get('top_k', 5))
+    except (TypeError, ValueError):
+        top_k = 0
+    if top_k < 1:
+        raise ValueError("'top_k' must be a positive integer")
+    return top_k
+
+def parse_explain_points(data, sweeps):
+    points = data.get('explain_at') or []
+    if not isinstance(points, list) or not all(isinstance(p, dict) for p in points):
+        raise ValueError("'explain_at' must be a list of {feature: value} points")
+    if len(points) > WHAT_IF_MAX_EXPLAIN:
+        raise ValueError(f"At most {WHAT_IF_MAX_EXPLAIN} points can be explained per request")
+    swept = {field for field, _ in sweeps}
+    for point in points:
+        unknown = [k for k in point if str(k).lower() not in swept]
+        if unknown:
+            raise ValueError(f"'explain_at' points can only set swept features, not {unknown}")
+    if points:
+        require_explainable(data)
+    return [{str(k).lower(): sweep_value(str(k).lower(), v) for k, v in point.items()} for point in points]
+
 @app.route('/explain', methods=['POST'])
 def explain():
-    global shap_service
-
+    bundle = current_bundle()
+    shap_service = get_shap_service(bundle)
     if shap_service is None:
         return jsonify({"error": "SHAP service not available", "success": False}), 500
 
@@ -300,77 +1292,158 @@ def explain():
         return jsonify({"error": "No data provided", "success": False}), 400
 
     try:
-        single_data = {
-            'age': int(data.get('age', 30)),
-            'balance': int(data.get('balance', 0)),
-            'day': int(data.get('day', 1)),
-            'duration': int(data.get('duration', 0)),
-            'campaign': int(data.get('campaign', 0)),
-            'pdays': int(data.get('pdays', 999)),
-            'previous': int(data.get('previous', 0)),
-            'job': str(data.get('job', 'unknown')),
-            'marital': str(data.get('marital', 'unknown')),
-            'education': str(data.get('education', 'unknown')),
-            'default': str(data.get('default', 'no')),
-            'housing': str(data.get('housing', 'no')),
-            'loan': str(data.get('loan', 'no')),
-            'contact': str(data.get('contact', 'unknown')),
-            'month': str(data.get('month', 'jan')),
-            'poutcome': str(data.get('poutcome', 'unknown')),
-        }
+        require_explainable(data)
+        aggregate = parse_aggregate(data)
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
 
-        df = pd.DataFrame([single_data])
+    try:
+        single_data = parse_explain_payload(data)
 
-        numeric_features_model_order = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
-        numeric_features_scaler_order = ["age", "balance", "campaign", "pdays", "previous", "day", "duration"]
-        categorical_cols = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
+        with measure("transform"):
+            X_processed = bundle.pipeline.transform_records([single_data])
+        with measure("predict"):
+            prediction = cached_scores(bundle, X_processed)[0]
 
-        X_raw = df[numeric_features_model_order + categorical_cols].copy()
-        X_raw = X_raw.replace('unknown', np.nan).replace('Unknown', np.nan)
+        with measure("shap"):
+            explanation = shap_service.explain(X_processed, single_data, aggregate=aggregate)
 
-        for col in numeric_features_model_order:
-            X_raw[col] = X_raw[col].fillna(-1 if col == 'pdays' else 0)
-        for col in categorical_cols:
-            X_raw[col] = X_raw[col].fillna('unknown')
+        with measure("serialize"):
+            return jsonify({
+                "success": True,
+                "model_version": bundle.version,
+                "prediction": float(prediction),
+                "prediction_pct": float(prediction * 100),
+                **explanation
+            })
 
-        if "pdays" in X_raw.columns:
-            X_raw["pdays"] = X_raw["pdays"].replace(999, -1)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": f"Explanation failed: {str(e)}", "success": False}), 500
 
-        for col in numeric_features_model_order:
-            if col in IQR_BOUNDS:
-                lower = IQR_BOUNDS[col]['lower']
-                upper = IQR_BOUNDS[col]['upper']
-                X_raw[col] = np.where(X_raw[col] < lower, lower,
-                             np.where(X_raw[col] > upper, upper, X_raw[col]))
+@app.route('/explain_batch', methods=['POST'])
+def explain_batch():
+    bundle = current_bundle()
+    shap_service = get_shap_service(bundle)
+    if shap_service is None:
+        return jsonify({"error": "SHAP service not available", "success": False}), 500
 
-        encoded_arr = encoder.transform(X_raw[categorical_cols])
-        encoded_cols = encoder.get_feature_names_out(categorical_cols)
-        df_encoded = pd.DataFrame(encoded_arr, columns=encoded_cols, index=X_raw.index)
+    data = request.get_json(silent=True)
+    leads = data.get('leads') if isinstance(data, dict) else data
+    if not leads or not isinstance(leads, list):
+        return jsonify({"error": "No leads provided", "success": False}), 400
 
-        X_processed = pd.concat([X_raw[numeric_features_model_order], df_encoded], axis=1)
-        X_processed[numeric_features_scaler_order] = scaler.transform(X_processed[numeric_features_scaler_order])
+    try:
+        top_k = int(data.get('top_k', 5)) if isinstance(data, dict) else 5
+        include_all = bool(data.get('all_impacts', True)) if isinstance(data, dict) else True
+        if top_k < 1:
+            return jsonify({"error": "top_k must be at least 1", "success": False}), 400
+        require_explainable(data if isinstance(data, dict) else {})
+        aggregate = parse_aggregate(data)
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
 
-        if hasattr(model, "feature_names_in_"):
-            X_processed = X_processed[model.feature_names_in_]
+    try:
+        rows = [parse_explain_payload(lead) for lead in leads]
+        with measure("transform"):
+            X_processed = bundle.pipeline.transform_records(rows)
+        with measure("predict"):
+            predictions = cached_scores(bundle, X_processed)
+
+        with measure("shap"):
+            explanations = shap_service.explain_many(X_processed, rows, top_k=top_k, include_all=include_all,
+                                                    aggregate=aggregate)
+        record_rows(len(rows))
+
+        with measure("serialize"):
+            return jsonify({
+                "success": True,
+                "model_version": bundle.version,
+                "results": [
+                    {
+                        "prediction": float(prediction),
+                        "prediction_pct": float(prediction * 100),
+                        **explanation
+                    }
+                    for prediction, explanation in zip(predictions, explanations)
+                ]
+            })
 
-        if hasattr(model, "predict_proba"):
-            prediction = model.predict_proba(X_processed)[0, 1]
-        else:
-            prediction = model.predict(X_processed)[0]
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": f"Explanation failed: {str(e)}", "success": False}), 500
 
-        explanation = shap_service.explain(X_processed, single_data)
+@app.route('/what_if', methods=['POST'])
+def what_if():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('lead'), dict):
+        return jsonify({"error": "Provide a 'lead' object and a 'sweep'", "success": False}), 400
 
-        return jsonify({
+    bundle = current_bundle()
+    try:
+        model_name = parse_model(bundle, data)
+        sweeps = parse_sweeps(bundle.pipeline, data)
+        points = parse_explain_points(data, sweeps)
+        aggregate = parse_aggregate(data)
+        top_k = parse_top_k(data)
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+
+    shap_service = None
+    if points:
+        shap_service = get_shap_service(bundle)
+        if shap_service is None:
+            return jsonify({"error": "SHAP service not available", "success": False}), 500
+
+    try:
+        lead = parse_explain_payload(data['lead'])
+        with measure("transform"):
+            # The base lead is encoded once; the grid only rewrites the swept columns.
+            X = np.vstack([bundle.pipeline.transform_records([lead]), bundle.pipeline.sweep(lead, sweeps)])
+        with measure("predict"):
+            scores, _ = score_with(bundle, model_name, X)
+        record_rows(len(X))
+
+        shape = [len(values) for _, values in sweeps]
+        body = {
             "success": True,
-            "prediction": float(prediction),
-            "prediction_pct": float(prediction * 100),
-            **explanation
-        })
+            "model": model_name,
+            "model_version": bundle.version,
+            "base_score": float(scores[0]),
+            "features": [field for field, _ in sweeps],
+            "values": {field: values for field, values in sweeps},
+            "shape": shape,
+            "scores": np.asarray(scores[1:], dtype=float).reshape(shape).tolist(),
+            # Swept numeric values are clipped to these before scoring, so curves flatten outside them.
+            "bounds": {field: bundle.pipeline.iqr_bounds[field] for field, _ in sweeps
+                       if field in bundle.pipeline.iqr_bounds},
+        }
+
+        if points:
+            rows = [parse_explain_payload({**data['lead'], **point}) for point in points]
+            with measure("transform"):
+                X_points = bundle.pipeline.transform_records(rows)
+            with measure("predict"):
+                point_scores = cached_scores(bundle, X_points)
+            with measure("shap"):
+                explanations = shap_service.explain_many(X_points, rows, top_k=top_k, include_all=False,
+                                                         aggregate=aggregate)
+            body["explanations"] = [
+                {"point": point, "prediction": float(score), **explanation}
+                for point, score, explanation in zip(points, point_scores, explanations)
+            ]
+
+        with measure("serialize"):
+            return jsonify(body)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Explanation failed: {str(e)}", "success": False}), 500
+        return jsonify({"error": f"What-if failed: {str(e)}", "success": False}), 500
 
 if __name__ == '__main__':
+    # Forked before any thread starts; the workers load the artifacts on their first shard.
+    start_shard_pool(None)
+    threading.Thread(target=start_up, name='artifact-loader', daemon=True).start()
+    start_watcher()
     app.run(host='0.0.0.0', port=5001)
@@ -1,23 +1,52 @@
-import pandas as pd
-import numpy as np
-import joblib
+"""Build model/iqr_bounds.json, the outlier-clipping bounds the API loads with the model.
 
-df = pd.read_csv('data/bank-full.csv', sep=';')
+    python save_iqr_bounds.py                              # data/bank-full.csv
+    python save_iqr_bounds.py leads-2023.csv leads-2024.csv --workers 2
 
-numeric_cols = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
+Each CSV is streamed in chunks into mergeable quantile sketches, so input
+size is bounded by disk rather than RAM, and several files are sketched in
+parallel before being merged.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-if "pdays" in df.columns:
-    df["pdays"] = df["pdays"].replace(999, -1)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scoring_logic.iqr_bounds import (
+    DEFAULT_MAX_BINS, IQR_MULTIPLIER, bounds_from_sketches, merge_sketches, sketch_csv, write_bounds,
+)
 
-iqr_bounds = {}
-for col in numeric_cols:
-    Q1 = df[col].quantile(0.25)
-    Q3 = df[col].quantile(0.75)
-    IQR = Q3 - Q1
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
-    iqr_bounds[col] = {'lower': float(lower), 'upper': float(upper)}
 
-joblib.dump(iqr_bounds, 'model/iqr_bounds.pkl')
-print("IQR bounds saved to model/iqr_bounds.pkl")
-print(iqr_bounds)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data', nargs='*', default=['data/bank-full.csv'], help="training CSVs (shards)")
+    parser.add_argument('--output', default='model/iqr_bounds.json')
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=1, help="files sketched in parallel")
+    parser.add_argument('--max-bins', type=int, default=DEFAULT_MAX_BINS,
+                        help="distinct values kept exactly per column before the sketch compacts")
+    parser.add_argument('--multiplier', type=float, default=IQR_MULTIPLIER)
+    args = parser.parse_args()
+
+    jobs = [(path, args.chunk_rows, args.max_bins) for path in args.data]
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(sketch_csv, *zip(*jobs)))
+    else:
+        results = [sketch_csv(*job) for job in jobs]
+
+    sketches, rows = merge_sketches(results)
+    columns = bounds_from_sketches(sketches, args.multiplier)
+    artifact = write_bounds(args.output, columns, rows, args.data, args.multiplier)
+
+    print(f"IQR bounds from {rows} rows saved to {args.output}")
+    for col, entry in columns.items():
+        note = "" if entry["exact"] else " (approximate)"
+        print(f"  {col:<9} [{entry['lower']:.2f}, {entry['upper']:.2f}]{note}")
+    if not artifact["exact"]:
+        print(f"⚠️ Some columns had more than {args.max_bins} distinct values; raise --max-bins for exact quartiles.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Build model/segments.json, the customer-segment centroids the API assigns leads to.
+
+    python save_segments.py                     # data/bank-full.csv
+    python save_segments.py leads.csv --output model/segments.json
+    python save_segments.py --k 3               # skip the k search
+
+Refits the clustering notebook's KMeans (same features, random_state=42),
+picking k by silhouette score over 2..9 as the notebook does unless --k is
+given, and names the clusters from their centroids by the notebook's rules
+(most campaign contacts, then the older of the rest). The k and how it was
+chosen are recorded in the artifact. Check the printed profile against the
+names before publishing with upload_to_hf.py.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scoring_logic.csv_stream import read_csv
+from scoring_logic.segments import SEGMENT_NUMERIC_COLS, export_segments, fit_segments, name_clusters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data', nargs='?', default='data/bank-full.csv', help="training CSV")
+    parser.add_argument('--output', default='model/segments.json')
+    parser.add_argument('--k', type=int, help="number of clusters (default: best silhouette score)")
+    parser.add_argument('--silhouette-sample', type=int, help="rows to score silhouette on (default: all)")
+    args = parser.parse_args()
+
+    df = read_csv(args.data)
+    kmeans, preprocessor, clusters, clustering = fit_segments(df, args.k, sample_size=args.silhouette_sample)
+    for k, score in (clustering.get("silhouette") or {}).items():
+        print(f"k={k}: silhouette {score:.4f}")
+    try:
+        labels = name_clusters(kmeans, preprocessor)
+    except ValueError as e:
+        sys.exit(f"❌ k={clustering['k']} ({clustering['selection']}): {e}; pass --k 3 to keep the notebook's segments")
+    export_segments(args.output, kmeans, preprocessor, labels, clustering)
+
+    df['segment'] = [labels[c] for c in clusters]
+    profile = df.groupby('segment')[SEGMENT_NUMERIC_COLS].mean().round(2)
+    profile.insert(0, 'rows', df['segment'].value_counts())
+    print(f"Segments from {len(df)} rows (k={clustering['k']}, {clustering['selection']}) saved to {args.output}")
+    print(profile.to_string())
+
+
+if __name__ == "__main__":
+    main()
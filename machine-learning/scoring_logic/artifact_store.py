@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = 'manifest.json'
+# sha256 of each verified artifact, keyed on its stat, so unchanged files are not re-hashed.
+VERIFIED_NAME = '.verified.json'
+LFS_POINTER_PREFIX = b'version https://git-lfs.github.com/spec/'
+# Git LFS pointer files are ~130 bytes; anything this small is checked for the pointer header.
+LFS_POINTER_MAX_BYTES = 1024
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(paths):
+    return {
+        "artifacts": [
+            {"name": os.path.basename(path), "sha256": sha256_file(path), "size": os.path.getsize(path)}
+            for path in paths
+        ]
+    }
+
+
+def write_manifest(path, manifest):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_manifest(path):
+    try:
+        with open(path) as f:
+            return {entry["name"]: entry for entry in json.load(f)["artifacts"]}
+    except FileNotFoundError:
+        return None
+
+
+def read_verified(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def file_stat(path):
+    # ctime and inode change on any rewrite or replacement, even one that keeps size and mtime.
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino]
+
+
+def matches(path, entry, verified=None):
+    """Size first (free), then the sha256, unless ``verified`` has it for the file as it is now.
+
+    ``verified`` maps a filename to its last hash and stat; it is updated in place.
+    """
+    if not os.path.isfile(path) or os.path.getsize(path) != entry["size"]:
+        return False
+    if verified is None:
+        return sha256_file(path) == entry["sha256"]
+    name, stat = os.path.basename(path), file_stat(path)
+    cached = verified.get(name)
+    if cached is None or cached["stat"] != stat:
+        cached = verified[name] = {"stat": stat, "sha256": sha256_file(path)}
+    return cached["sha256"] == entry["sha256"]
+
+
+def is_lfs_pointer(path):
+    """True for a checked-out Git LFS pointer standing in for the real file."""
+    if os.path.getsize(path) > LFS_POINTER_MAX_BYTES:
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX
+
+
+def same_contents(a, b):
+    if not os.path.isfile(a) or not os.path.isfile(b):
+        return False
+    if os.path.samefile(a, b):
+        return True
+    return os.path.getsize(a) == os.path.getsize(b) and sha256_file(a) == sha256_file(b)
+
+
+def link_into_place(source, destination):
+    """Hardlink, else symlink, else copy ``source`` to ``destination`` atomically."""
+    source = os.path.realpath(source)
+    tmp = f"{destination}.tmp-{os.getpid()}"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(source, tmp)
+        method = "hardlink"
+    except OSError:
+        try:
+            os.symlink(source, tmp)
+            method = "symlink"
+        except OSError:
+            shutil.copyfile(source, tmp)
+            method = "copy"
+    os.replace(tmp, destination)
+    return method
+
+
+class ArtifactSource:
+    """Where artifacts come from: a Hugging Face repo or a local directory standing in for one."""
+
+    def __init__(self, repo_id=None, local_dir=None, revision=None):
+        self.repo_id = repo_id
+        self.local_dir = local_dir
+        self.revision = revision
+
+    def __str__(self):
+        if self.local_dir:
+            return self.local_dir
+        return f"{self.repo_id}@{self.revision[:12]}" if self.revision else self.repo_id
+
+    def pinned(self):
+        """This source at the hub's current commit, so one sync never mixes files from two commits."""
+        if self.local_dir or self.revision:
+            return self
+        from huggingface_hub import HfApi
+        return ArtifactSource(repo_id=self.repo_id, revision=HfApi().model_info(self.repo_id).sha)
+
+    def fetch(self, filename):
+        """Path to ``filename`` in the source (the HF cache for the hub); raises if it is missing."""
+        if self.local_dir:
+            path = os.path.join(self.local_dir, filename)
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"{filename} not found in {self.local_dir}")
+            return path
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(repo_id=self.repo_id, filename=filename, revision=self.revision)
+
+
+def sync_artifacts(source, destination, filenames, max_workers=4, on_file=None):
+    """Make ``destination`` hold verified copies of ``filenames``; returns {name: action}.
+
+    The manifest is read from the source when there is one, else from
+    ``destination``. Files whose sha256 already matches are left alone (the
+    hash is cached in ``.verified.json`` and only recomputed when a file's
+    size, mtime, ctime or inode changes); the rest are fetched concurrently,
+    verified and linked into place. Without a
+    manifest every file is fetched from the source and replaces the local
+    copy when the two differ; a local file is only kept as-is when there is
+    no source to compare with (or it cannot be reached), and never when it
+    is a Git LFS pointer. Raises ValueError when an artifact cannot be
+    brought up to date.
+    """
+    os.makedirs(destination, exist_ok=True)
+    manifest_path = os.path.join(destination, MANIFEST_NAME)
+
+    if source is not None:
+        try:
+            source = source.pinned()
+        except Exception as e:
+            print(f"   ⚠️ Could not resolve the current revision of {source} ({e}); fetching the latest files")
+        try:
+            link_into_place(source.fetch(MANIFEST_NAME), manifest_path)
+        except Exception as e:
+            print(f"   ⚠️ No artifact manifest in {source} ({e}); integrity cannot be checked")
+    manifest = read_manifest(manifest_path)
+    verified_path = os.path.join(destination, VERIFIED_NAME)
+    verified = read_verified(verified_path)
+    previously_verified = dict(verified)
+
+    def sync_one(filename):
+        target = os.path.join(destination, filename)
+        entry = manifest.get(filename) if manifest else None
+        if entry is None:
+            if manifest is not None:
+                raise ValueError(f"{filename} is not listed in {manifest_path}")
+            return sync_unlisted(filename, target)
+        if matches(target, entry, verified):
+            return "verified"
+        if source is None:
+            raise ValueError(f"{filename} is missing or does not match {MANIFEST_NAME}, and no artifact source is set")
+
+        fetched = source.fetch(filename)
+        if not matches(fetched, entry):
+            raise ValueError(f"{filename} from {source} does not match its sha256 in {MANIFEST_NAME}")
+        method = link_into_place(fetched, target)
+        verified[filename] = {"stat": file_stat(target), "sha256": entry["sha256"]}
+        return method
+
+    def sync_unlisted(filename, target):
+        # No manifest to check against: the source's copy wins whenever it differs from the local one.
+        if source is not None:
+            try:
+                fetched = source.fetch(filename)
+            except Exception as e:
+                if not os.path.isfile(target):
+                    raise
+                print(f"   ⚠️ Could not fetch {filename} from {source} ({e}); keeping the local copy")
+            else:
+                if is_lfs_pointer(fetched):
+                    raise ValueError(f"{filename} in {source} is a Git LFS pointer, not the artifact")
+                if same_contents(fetched, target):
+                    return "unchanged"
+                return link_into_place(fetched, target)
+        if not os.path.isfile(target):
+            raise ValueError(f"{filename} is missing and no artifact source is set")
+        if is_lfs_pointer(target):
+            raise ValueError(f"{filename} is a Git LFS pointer; run `git lfs pull` or set HF_REPO_ID")
+        return "unverified"
+
+    def run(filename):
+        return on_file(filename, sync_one) if on_file else sync_one(filename)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(filenames)))) as pool:
+        results = dict(zip(filenames, pool.map(lambda name: _capture(run, name), filenames)))
+
+    if verified != previously_verified:
+        # Merged with what other processes recorded meanwhile; a lost entry only costs a re-hash.
+        write_manifest(verified_path, {**read_verified(verified_path), **verified})
+
+    failures = {name: str(result) for name, result in results.items() if isinstance(result, Exception)}
+    if failures:
+        raise ValueError("; ".join(f"{name}: {error}" for name, error in failures.items()))
+    return results
+
+
+def _capture(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+def _bucket(n):
+    size = 1
+    while size < n:
+        size *= 2
+    return size
+
+
+class _Request:
+    __slots__ = ('X', 'done', 'result', 'error')
+
+    def __init__(self, X):
+        self.X = X
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent small scoring calls into one ``score_fn`` call.
+
+    Callers block in ``submit`` while a single dispatcher thread waits up to
+    ``max_wait_ms`` (or until ``max_rows`` rows are queued), stacks the
+    pending matrices, scores them once and hands each caller its slice.
+    """
+
+    def __init__(self, score_fn, max_wait_ms=2.0, max_rows=64):
+        self.score_fn = score_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_rows = int(max_rows)
+        self._queue = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.batch_sizes = {}
+        self.queue_depths = {}
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, X):
+        if len(X) >= self.max_rows or self._closed:
+            return np.asarray(self.score_fn(X), dtype=float)
+
+        request = _Request(X)
+        with self._cond:
+            if self._closed:
+                return np.asarray(self.score_fn(X), dtype=float)
+            self._queue.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def close(self):
+        """Stop the dispatcher once the queue is drained; later calls are scored inline."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _collect(self):
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return None, 0
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(r.X) for r in self._queue) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, n_rows = [], 0
+            while self._queue and n_rows + len(self._queue[0].X) <= self.max_rows:
+                request = self._queue.popleft()
+                batch.append(request)
+                n_rows += len(request.X)
+            if not batch:
+                batch.append(self._queue.popleft())
+            depth = len(batch) + len(self._queue)
+        return batch, depth
+
+    def _run(self):
+        while True:
+            batch, depth = self._collect()
+            if batch is None:
+                return
+            try:
+                scores = np.asarray(self.score_fn(np.vstack([r.X for r in batch])), dtype=float)
+                offset = 0
+                for request in batch:
+                    request.result = scores[offset:offset + len(request.X)]
+                    offset += len(request.X)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+            self._record(sum(len(r.X) for r in batch), depth)
+
+    def _record(self, n_rows, depth):
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += n_rows
+            size = _bucket(n_rows)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            depth = _bucket(depth)
+            self.queue_depths[depth] = self.queue_depths.get(depth, 0) + 1
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._queue)
+        with self._stats_lock:
+            return {
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_rows": self.max_rows,
+                "queue_depth": pending,
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                "queue_depth_histogram": {str(k): v for k, v in sorted(self.queue_depths.items())},
+            }
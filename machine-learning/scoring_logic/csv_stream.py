@@ -0,0 +1,76 @@
+import csv
+import pandas as pd
+
+SNIFF_BYTES = 64 * 1024
+CANDIDATE_DELIMITERS = ",;\t|"
+
+
+def _read_head(source):
+    if hasattr(source, 'read'):
+        position = source.tell()
+        head = source.read(SNIFF_BYTES)
+        source.seek(position)
+        return head
+    with open(source, 'rb') as f:
+        return f.read(SNIFF_BYTES)
+
+
+def sniff_delimiter(source):
+    """Guess the delimiter from the first few KB so the C parser can do the rest."""
+    head = _read_head(source)
+    if isinstance(head, bytes):
+        head = head.decode('utf-8', errors='replace')
+
+    # Drop a trailing partial line so the sniffer only sees complete rows.
+    if len(head) >= SNIFF_BYTES and '\n' in head:
+        head = head[:head.rindex('\n')]
+    if not head.strip():
+        return ','
+
+    try:
+        return csv.Sniffer().sniff(head, delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        first_line = head.splitlines()[0]
+        counts = {d: first_line.count(d) for d in CANDIDATE_DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else ','
+
+
+def normalize_columns(df):
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    return df
+
+
+def read_csv(source, limit=None):
+    df = pd.read_csv(source, sep=sniff_delimiter(source), engine='c', nrows=limit)
+    return normalize_columns(df)
+
+
+def read_csv_chunks(source, chunk_rows, limit=None, columns=None, skip_rows=0):
+    """Yield normalized DataFrame chunks of at most ``chunk_rows`` rows.
+
+    ``columns`` restricts parsing to those (normalized) column names.
+    ``skip_rows`` data rows are stepped over by the tokenizer without being
+    converted, and ``limit`` counts from the start of the file.
+    """
+    sep = sniff_delimiter(source)
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda name: str(name).lower().strip() in wanted
+    header = {}
+    if skip_rows:
+        position = source.tell() if hasattr(source, 'read') else None
+        names = list(pd.read_csv(source, sep=sep, engine='c', nrows=0).columns)
+        if position is not None:
+            source.seek(position)
+        header = {"skiprows": skip_rows + 1, "header": None, "names": names}
+        if limit is not None:
+            limit = max(limit - skip_rows, 0)
+            if not limit:
+                return
+    reader = pd.read_csv(source, sep=sep, engine='c', chunksize=chunk_rows, nrows=limit,
+                         usecols=usecols, **header)
+    with reader:
+        for chunk in reader:
+            yield normalize_columns(chunk)
@@ -0,0 +1,140 @@
+import io
+import json
+import re
+import zipfile
+
+import numpy as np
+
+NPZ_FORMAT_VERSION = 1
+# Layers that are the identity at inference time.
+INFERENCE_NOOPS = {'InputLayer', 'Dropout'}
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _sigmoid(x):
+    # exp(-log(1 + exp(-x))) never overflows, unlike 1 / (1 + exp(-x)).
+    return np.exp(-np.logaddexp(0, -x))
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'softmax': _softmax,
+}
+
+
+def _snake_case(name):
+    # Keras 3 stores each layer's weights under its snake-cased class name: dense, dense_1, ...
+    name = re.sub(r'(.)([A-Z][a-z]+)', r'\1_\2', re.sub(r'\W+', '', name))
+    return re.sub(r'([a-z])([A-Z])', r'\1_\2', name).lower()
+
+
+def read_keras(path):
+    """Dense layers of a Keras 3 ``.keras`` Sequential model as [(kernel, bias, activation)].
+
+    Reads the archive directly, so only h5py is needed, not TensorFlow.
+    """
+    try:
+        import h5py
+    except ImportError as e:
+        # Export-time only, so it is not in requirements.txt.
+        raise ImportError("Reading a .keras model needs h5py: pip install h5py") from e
+
+    with zipfile.ZipFile(path) as archive:
+        config = json.loads(archive.read('config.json'))
+        weights_file = io.BytesIO(archive.read('model.weights.h5'))
+    if config.get('class_name') != 'Sequential':
+        raise ValueError(f"{path} is a {config.get('class_name')}, only Sequential models can be exported")
+
+    layers, seen = [], {}
+    with h5py.File(weights_file, 'r') as weights:
+        for layer in config['config']['layers']:
+            kind = layer['class_name']
+            if kind == 'InputLayer':
+                continue
+            key = _snake_case(kind)
+            index = seen.get(key, 0)
+            seen[key] = index + 1
+            if kind in INFERENCE_NOOPS:
+                continue
+            if kind != 'Dense':
+                raise ValueError(f"Layer {layer['config'].get('name')} ({kind}) is not supported")
+
+            activation = layer['config'].get('activation') or 'linear'
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Activation '{activation}' is not supported")
+            variables = weights[f"layers/{key}{f'_{index}' if index else ''}/vars"]
+            kernel = np.asarray(variables['0'], dtype=np.float32)
+            if layer['config'].get('use_bias', True):
+                bias = np.asarray(variables['1'], dtype=np.float32)
+            else:
+                bias = np.zeros(kernel.shape[1], dtype=np.float32)
+            layers.append((kernel, bias, activation))
+
+    if not layers:
+        raise ValueError(f"{path} has no Dense layers")
+    return layers
+
+
+def save_npz(path, layers):
+    arrays = {"format_version": np.array(NPZ_FORMAT_VERSION),
+              "activations": np.array([activation for _, _, activation in layers])}
+    for i, (kernel, bias, _) in enumerate(layers):
+        arrays[f"kernel_{i}"] = kernel
+        arrays[f"bias_{i}"] = bias
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+class DenseNet:
+    """Forward pass of a stack of Dense layers in NumPy, in float32 like Keras.
+
+    Rows go through in blocks of ``batch_rows`` so hidden activations stay
+    small however large the input is.
+    """
+
+    def __init__(self, layers, batch_rows=65536):
+        self.layers = [(np.ascontiguousarray(k, dtype=np.float32), np.asarray(b, dtype=np.float32), ACTIVATIONS[a])
+                       for k, b, a in layers]
+        self.activations = [a for _, _, a in layers]
+        self.n_features = self.layers[0][0].shape[0]
+        self.batch_rows = batch_rows
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != NPZ_FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {int(data['format_version'])}, "
+                                 f"expected {NPZ_FORMAT_VERSION}")
+            activations = [str(a) for a in data["activations"]]
+            layers = [(data[f"kernel_{i}"], data[f"bias_{i}"], a) for i, a in enumerate(activations)]
+        return cls(layers, **kwargs)
+
+    def forward(self, X):
+        h = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            h = h @ kernel
+            h += bias
+            h = activation(h)
+        return h
+
+    def predict_positive(self, X):
+        """Positive-class probability per row (the single sigmoid unit, or column 1 of a softmax)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected rows of {self.n_features} features, got shape {X.shape}")
+        scores = np.empty(len(X))
+        for start in range(0, len(X), self.batch_rows):
+            out = self.forward(X[start:start + self.batch_rows])
+            scores[start:start + len(out)] = out[:, 0] if out.shape[1] == 1 else out[:, 1]
+        return scores
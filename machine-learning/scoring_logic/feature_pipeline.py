@@ -0,0 +1,227 @@
+import numpy as np
+
+NUMERIC_COLS = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
+NUMERIC_SCALER_ORDER = ["age", "balance", "campaign", "pdays", "previous", "day", "duration"]
+CATEGORICAL_COLS = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
+INPUT_FIELDS = NUMERIC_COLS + CATEGORICAL_COLS
+
+NUMERIC_FILL = {'pdays': -1.0}
+PDAYS_NOT_CONTACTED = 999
+MISSING_TOKENS = {'unknown', 'Unknown', 'nan', 'None', ''}
+
+
+def _to_float(value, fill, col):
+    # Only missing markers are filled, as the old replace/fillna chain did; anything else must parse.
+    if value is None or (isinstance(value, str) and value.strip() in MISSING_TOKENS):
+        return fill
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid numeric value {value!r} in column {col!r}") from None
+    return fill if number != number else number
+
+
+def _to_category(value):
+    if value is None:
+        return 'unknown'
+    text = str(value)
+    return 'unknown' if text in MISSING_TOKENS else text
+
+
+class FeaturePipeline:
+    """Compiled replacement for the replace/fillna/clip/encode/scale/reindex chain.
+
+    Everything the fitted encoder and scaler know is folded into flat NumPy
+    lookups once, so rows go from raw values to the model's feature matrix
+    without building a DataFrame.
+    """
+
+    ARRAY_FIELDS = ('numeric_index', 'numeric_fill', 'lower', 'upper', 'clip_index', 'shift', 'scale',
+                    'field_of_column')
+    META_FIELDS = ('feature_names', 'n_features', 'numeric_cols', 'categorical_cols', 'pdays_slot',
+                   'iqr_bounds', 'handle_unknown', 'category_lookup', 'fields')
+
+    def __init__(self, encoder, scaler, iqr_bounds, feature_names=None):
+        categorical_cols = list(getattr(encoder, 'feature_names_in_', CATEGORICAL_COLS))
+        encoded_names = list(encoder.get_feature_names_out(categorical_cols))
+
+        if feature_names is None or len(feature_names) == 0:
+            feature_names = NUMERIC_COLS + encoded_names
+        self.feature_names = [str(f) for f in feature_names]
+        self.n_features = len(self.feature_names)
+        position = {name: i for i, name in enumerate(self.feature_names)}
+
+        missing = [c for c in NUMERIC_COLS + encoded_names if c not in position]
+        if missing:
+            raise ValueError(f"Model features do not cover pipeline outputs: {missing}")
+
+        self.numeric_cols = list(NUMERIC_COLS)
+        self.categorical_cols = categorical_cols
+        self.numeric_index = np.array([position[c] for c in self.numeric_cols], dtype=np.intp)
+        self.numeric_fill = np.array([NUMERIC_FILL.get(c, 0.0) for c in self.numeric_cols])
+        self.pdays_slot = self.numeric_cols.index('pdays')
+
+        self.lower = np.full(self.n_features, -np.inf)
+        self.upper = np.full(self.n_features, np.inf)
+        self.iqr_bounds = {}
+        for col in self.numeric_cols:
+            if col in iqr_bounds:
+                self.iqr_bounds[col] = dict(iqr_bounds[col])
+                self.lower[position[col]] = iqr_bounds[col]['lower']
+                self.upper[position[col]] = iqr_bounds[col]['upper']
+        self.clip_index = np.array([position[c] for c in self.iqr_bounds], dtype=np.intp)
+
+        # Fused affine stage: (X - shift) / scale over the full width, identity on one-hot columns.
+        self.shift = np.zeros(self.n_features)
+        self.scale = np.ones(self.n_features)
+        scaler_cols = list(getattr(scaler, 'feature_names_in_', NUMERIC_SCALER_ORDER))
+        mean = scaler.mean_ if getattr(scaler, 'with_mean', True) else np.zeros(len(scaler_cols))
+        scale = scaler.scale_ if getattr(scaler, 'with_std', True) else np.ones(len(scaler_cols))
+        for col, m, s in zip(scaler_cols, mean, scale):
+            self.shift[position[col]] = m
+            self.scale[position[col]] = s
+
+        drop_idx = getattr(encoder, 'drop_idx_', None)
+        self.handle_unknown = getattr(encoder, 'handle_unknown', 'ignore')
+        self.category_lookup = []
+        self.field_of_column = np.full(self.n_features, -1, dtype=np.intp)
+        for slot, col in enumerate(self.numeric_cols):
+            self.field_of_column[position[col]] = slot
+
+        names = iter(encoded_names)
+        for i, (col, categories) in enumerate(zip(categorical_cols, encoder.categories_)):
+            dropped = None if drop_idx is None or drop_idx[i] is None else int(drop_idx[i])
+            lookup = {}
+            for j, category in enumerate(categories):
+                if j == dropped:
+                    lookup[str(category)] = -1
+                    continue
+                column = position[next(names)]
+                lookup[str(category)] = column
+                self.field_of_column[column] = len(self.numeric_cols) + i
+            self.category_lookup.append(lookup)
+
+        self.fields = self.numeric_cols + self.categorical_cols
+
+    def _unknown(self, col, value):
+        if self.handle_unknown == 'error':
+            raise ValueError(f"Found unknown category {value!r} in column {col!r}")
+        return -1
+
+    def _finish(self, numeric, hot_rows, hot_cols):
+        n_rows = numeric.shape[0]
+        pdays = numeric[:, self.pdays_slot]
+        pdays[pdays == PDAYS_NOT_CONTACTED] = -1.0
+
+        X = np.zeros((n_rows, self.n_features))
+        X[:, self.numeric_index] = numeric
+        if len(hot_cols):
+            X[hot_rows, hot_cols] = 1.0
+
+        if len(self.clip_index):
+            X[:, self.clip_index] = np.clip(
+                X[:, self.clip_index], self.lower[self.clip_index], self.upper[self.clip_index]
+            )
+        X -= self.shift
+        X /= self.scale
+        return X
+
+    def transform_records(self, records):
+        """Map a list of raw lead dicts to the model feature matrix."""
+        n_rows = len(records)
+        numeric = np.empty((n_rows, len(self.numeric_cols)))
+        hot_rows, hot_cols = [], []
+
+        for r, record in enumerate(records):
+            for slot, col in enumerate(self.numeric_cols):
+                numeric[r, slot] = _to_float(record.get(col), self.numeric_fill[slot], col)
+            for col, lookup in zip(self.categorical_cols, self.category_lookup):
+                value = _to_category(record.get(col))
+                column = lookup.get(value)
+                if column is None:
+                    column = self._unknown(col, value)
+                if column >= 0:
+                    hot_rows.append(r)
+                    hot_cols.append(column)
+
+        return self._finish(numeric, np.array(hot_rows, dtype=np.intp), np.array(hot_cols, dtype=np.intp))
+
+    def transform_columns(self, columns):
+        """Map a dict of equally long column arrays to the model feature matrix."""
+        n_rows = len(columns[self.numeric_cols[0]])
+        numeric = np.empty((n_rows, len(self.numeric_cols)))
+
+        for slot, col in enumerate(self.numeric_cols):
+            values = np.asarray(columns[col])
+            if values.dtype.kind in 'biuf':
+                values = values.astype(np.float64)
+            else:
+                values = np.array([_to_float(v, np.nan, col) for v in values], dtype=np.float64)
+            numeric[:, slot] = np.where(np.isnan(values), self.numeric_fill[slot], values)
+
+        hot_rows, hot_cols = [], []
+        for col, lookup in zip(self.categorical_cols, self.category_lookup):
+            raw = columns[col]
+            if hasattr(raw, 'categories'):
+                # Already dictionary-encoded (pandas Categorical, Arrow dictionary): map each category once.
+                uniques = np.append(np.asarray(raw.categories, dtype=object).astype(str), 'nan')
+                inverse = np.where(raw.codes < 0, len(uniques) - 1, raw.codes)
+            else:
+                values = np.asarray(raw, dtype=object).astype(str)
+                uniques, inverse = np.unique(values, return_inverse=True)
+            targets = []
+            for value in uniques:
+                value = _to_category(value)
+                column = lookup.get(value)
+                targets.append(self._unknown(col, value) if column is None else column)
+            mapped = np.array(targets, dtype=np.intp)[inverse.reshape(-1)]
+            rows = np.flatnonzero(mapped >= 0)
+            hot_rows.append(rows)
+            hot_cols.append(mapped[rows])
+
+        return self._finish(numeric, np.concatenate(hot_rows), np.concatenate(hot_cols))
+
+    def transform_frame(self, df):
+        return self.transform_columns({col: df[col].to_numpy() for col in self.fields})
+
+    def categories(self, field):
+        return list(self.category_lookup[self.categorical_cols.index(field)])
+
+    def _field_table(self, field, values):
+        """Model columns owned by ``field`` and their transformed contents for each of ``values``."""
+        if field in self.numeric_cols:
+            slot = self.numeric_cols.index(field)
+            column = self.numeric_index[slot]
+            numbers = np.array([_to_float(v, self.numeric_fill[slot], field) for v in values])
+            if slot == self.pdays_slot:
+                numbers[numbers == PDAYS_NOT_CONTACTED] = -1.0
+            numbers = np.clip(numbers, self.lower[column], self.upper[column])
+            return np.array([column]), ((numbers - self.shift[column]) / self.scale[column])[:, None]
+
+        slot = self.categorical_cols.index(field)
+        lookup = self.category_lookup[slot]
+        columns = np.flatnonzero(self.field_of_column == len(self.numeric_cols) + slot)
+        table = np.zeros((len(values), len(columns)))
+        for row, value in enumerate(values):
+            value = _to_category(value)
+            column = lookup.get(value)
+            if column is None:
+                column = self._unknown(field, value)
+            if column >= 0:
+                table[row, np.searchsorted(columns, column)] = 1.0
+        return columns, table
+
+    def sweep(self, record, sweeps):
+        """Feature matrix for ``record`` over the grid of ``sweeps`` ([(field, values), ...]), last field fastest.
+
+        The record goes through the pipeline once; each swept field then only
+        overwrites its own columns, broadcast across the grid.
+        """
+        base = self.transform_records([record])[0]
+        shape = tuple(len(values) for _, values in sweeps)
+        X = np.tile(base, (int(np.prod(shape)), 1))
+        grid = np.indices(shape).reshape(len(shape), -1)
+        for (field, values), index in zip(sweeps, grid):
+            columns, table = self._field_table(field, values)
+            X[:, columns] = table[index]
+        return X
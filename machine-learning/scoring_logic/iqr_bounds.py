@@ -0,0 +1,164 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .csv_stream import read_csv_chunks
+from .feature_pipeline import NUMERIC_COLS, PDAYS_NOT_CONTACTED
+
+BOUNDS_FORMAT = 'iqr_bounds'
+BOUNDS_VERSION = 1
+IQR_MULTIPLIER = 1.5
+DEFAULT_MAX_BINS = 65536
+
+
+class QuantileSketch:
+    """Mergeable quantile summary of one numeric column.
+
+    Holds exact (value, count) pairs, so quantiles match
+    ``pandas.Series.quantile`` (linear interpolation) as long as the column
+    has at most ``max_bins`` distinct values. Past that, runs of adjacent
+    values are folded into equal-count centroids and ``exact`` turns False;
+    the rank error is then about ``count / max_bins``. Sketches of separate
+    chunks or files merge into the sketch of their concatenation.
+    """
+
+    def __init__(self, max_bins=DEFAULT_MAX_BINS):
+        self.max_bins = int(max_bins)
+        self.values = np.empty(0)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.exact = True
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._absorb(*np.unique(values, return_counts=True))
+        return self
+
+    def merge(self, other):
+        self._absorb(other.values, other.counts)
+        self.exact = self.exact and other.exact
+        return self
+
+    def _absorb(self, values, counts):
+        values, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        self.values = values
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts])).astype(np.int64)
+        if len(self.values) > self.max_bins:
+            self._compact()
+
+    def _compact(self):
+        # Group adjacent values by rank into max_bins / 2 equal-count groups, each kept as its weighted mean.
+        bins = max(self.max_bins // 2, 1)
+        cumulative = np.cumsum(self.counts)
+        group = (cumulative - 1) * bins // cumulative[-1]
+        counts = np.bincount(group, weights=self.counts)
+        sums = np.bincount(group, weights=self.values * self.counts)
+        keep = counts > 0
+        self.values = sums[keep] / counts[keep]
+        self.counts = counts[keep].astype(np.int64)
+        self.exact = False
+
+    def quantile(self, q):
+        if not len(self.counts):
+            return float('nan')
+        cumulative = np.cumsum(self.counts)
+        position = (cumulative[-1] - 1) * q
+        below, above = int(np.floor(position)), int(np.ceil(position))
+        low = self.values[np.searchsorted(cumulative, below, side='right')]
+        high = self.values[np.searchsorted(cumulative, above, side='right')]
+        return float(low + (position - below) * (high - low))
+
+
+def column_values(frame, col):
+    values = pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=np.float64)
+    if col == 'pdays':
+        # Same recoding as the serving pipeline: "never contacted" is -1, not 999.
+        values[values == PDAYS_NOT_CONTACTED] = -1.0
+    return values
+
+
+def sketch_csv(path, chunk_rows=100000, max_bins=DEFAULT_MAX_BINS, columns=NUMERIC_COLS):
+    """One pass over a CSV in chunks; returns ({column: QuantileSketch}, rows)."""
+    sketches = {col: QuantileSketch(max_bins) for col in columns}
+    rows = 0
+    for chunk in read_csv_chunks(path, chunk_rows, columns=columns):
+        missing = [c for c in columns if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"{path} is missing numeric columns: {missing}")
+        for col in columns:
+            sketches[col].update(column_values(chunk, col))
+        rows += len(chunk)
+    return sketches, rows
+
+
+def merge_sketches(results):
+    """Merge the ``(sketches, rows)`` results of several shards."""
+    merged, total = {}, 0
+    for sketches, rows in results:
+        for col, sketch in sketches.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch
+        total += rows
+    return merged, total
+
+
+def bounds_from_sketches(sketches, multiplier=IQR_MULTIPLIER):
+    columns = {}
+    for col, sketch in sketches.items():
+        if not sketch.count:
+            raise ValueError(f"No numeric values found for '{col}'")
+        q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+        iqr = q3 - q1
+        columns[col] = {"q1": q1, "q3": q3, "lower": q1 - multiplier * iqr, "upper": q3 + multiplier * iqr,
+                        "count": sketch.count, "exact": sketch.exact}
+    return columns
+
+
+def write_bounds(path, columns, rows, sources, multiplier=IQR_MULTIPLIER):
+    artifact = {
+        "format": BOUNDS_FORMAT,
+        "version": BOUNDS_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "multiplier": multiplier,
+        "rows": rows,
+        "sources": [os.path.basename(s) for s in sources],
+        "exact": all(c["exact"] for c in columns.values()),
+        "columns": columns,
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(tmp, path)
+    return artifact
+
+
+def read_bounds(path):
+    """Load and check a bounds artifact; returns (bounds, artifact) where bounds is {column: {lower, upper}}."""
+    with open(path) as f:
+        artifact = json.load(f)
+    if artifact.get("format") != BOUNDS_FORMAT:
+        raise ValueError(f"{path} is not an IQR bounds artifact")
+    if artifact.get("version") != BOUNDS_VERSION:
+        raise ValueError(f"{path} has bounds format version {artifact.get('version')}, expected {BOUNDS_VERSION}")
+
+    columns = artifact.get("columns") or {}
+    missing = [c for c in NUMERIC_COLS if c not in columns]
+    if missing:
+        raise ValueError(f"{path} has no bounds for {missing}")
+    bounds = {}
+    for col in NUMERIC_COLS:
+        lower, upper = float(columns[col]["lower"]), float(columns[col]["upper"])
+        if not (np.isfinite(lower) and np.isfinite(upper)) or lower > upper:
+            raise ValueError(f"{path} has invalid bounds for '{col}': [{lower}, {upper}]")
+        bounds[col] = {"lower": lower, "upper": upper}
+    return bounds, artifact
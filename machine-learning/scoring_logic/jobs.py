@@ -0,0 +1,350 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .csv_stream import read_csv_chunks
+from .serialization import serialize_frame
+
+STATE_FILE = 'job.json'
+LOCK_FILE = 'job.lock'
+STATE_LOCK_FILE = 'state.lock'
+INPUT_FILE = 'input.csv'
+DTYPES_SUFFIX = '.dtypes.json'
+FINISHED = ('done', 'failed', 'cancelled')
+
+
+def count_rows(path):
+    """Data rows in a CSV, by newline count (quoted newlines make this an estimate)."""
+    lines, last = 0, b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+class JobManager:
+    """Batch scoring jobs that run in the background and spool results to disk.
+
+    Each job lives in ``root/<job_id>``: its state (``job.json``), the uploaded
+    input, and one CSV part per scored chunk named ``<index>-<rows>.csv``, with
+    the scored frame's dtypes next to it so results read back as scored.
+    A job is owned by whichever process holds the flock on ``job.lock``; the
+    lock is released when that process dies, so the next process that looks
+    at the job picks it up and resumes after the last spooled part, skipping
+    the rows already scored without parsing them.
+    Changes to ``job.json`` are serialized by a second, short-lived flock on
+    ``state.lock``, and a finished status is never overwritten, so a
+    cancellation from any process sticks and the worker stops after its
+    current chunk.
+
+    ``make_scorer(options)`` is called once per run and returns
+    ``(model_version, score)``, where ``score(chunk)`` returns the scored chunk.
+    """
+
+    def __init__(self, root, make_scorer, max_workers=2, chunk_rows=5000, max_pending=16, retention_hours=24):
+        self.root = root
+        self.make_scorer = make_scorer
+        self.max_workers = max_workers
+        self.chunk_rows = chunk_rows
+        self.max_pending = max_pending
+        self.retention_seconds = retention_hours * 3600
+        self.after_fork()
+
+    def after_fork(self):
+        # Claims and the pool belong to the process that made them.
+        self._claims = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def _read(self, job_id):
+        if not job_id or os.sep in job_id or job_id.startswith('.'):
+            return None
+        try:
+            with open(os.path.join(self._dir(job_id), STATE_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, job):
+        path = os.path.join(self._dir(job["id"]), STATE_FILE)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _state_lock(self, job_id):
+        fd = os.open(os.path.join(self._dir(job_id), STATE_LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _update(self, job_id, **changes):
+        """Apply ``changes`` to the job's state and return it as stored; None once the job is gone.
+
+        A job that is already done, failed or cancelled is returned unchanged.
+        """
+        if self._read(job_id) is None:
+            return None
+        try:
+            with self._state_lock(job_id):
+                job = self._read(job_id)
+                if job is None or job["status"] in FINISHED:
+                    return job
+                job.update(changes)
+                self._write(job)
+                return job
+        except FileNotFoundError:
+            # Removed while we were waiting for the lock.
+            return None
+
+    def _claim(self, job_id):
+        """Take the job's lock for this process; False if another live process holds it."""
+        with self._lock:
+            if job_id in self._claims:
+                return False
+            fd = os.open(os.path.join(self._dir(job_id), LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._claims[job_id] = fd
+            return True
+
+    def _release(self, job_id):
+        with self._lock:
+            fd = self._claims.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _parts(self, job_id):
+        """Spooled parts in order as (path, rows), stopping at the first gap."""
+        directory = self._dir(job_id)
+        found = {}
+        for name in os.listdir(directory):
+            stem, ext = os.path.splitext(name)
+            if ext == '.csv' and '-' in stem and name != INPUT_FILE:
+                index, rows = stem.split('-', 1)
+                if index.isdigit() and rows.isdigit():
+                    found[int(index)] = (os.path.join(directory, name), int(rows))
+        parts = []
+        while len(parts) in found:
+            parts.append(found[len(parts)])
+        return parts
+
+    def _write_part(self, job_id, index, scored):
+        path = os.path.join(self._dir(job_id), f"{index:05d}-{len(scored)}.csv")
+        # Written before the part itself, which only appears once complete.
+        with open(f"{path}{DTYPES_SUFFIX}", 'w') as f:
+            json.dump({str(name): str(dtype) for name, dtype in scored.dtypes.items() if dtype.kind in 'biufO'}, f)
+        with open(f"{path}.tmp", 'w') as f:
+            f.write(serialize_frame(scored, 'csv'))
+        os.replace(f"{path}.tmp", path)
+
+    def _read_part(self, path):
+        try:
+            with open(f"{path}{DTYPES_SUFFIX}") as f:
+                dtypes = json.load(f)
+        except (OSError, ValueError):
+            # Spooled before dtypes were recorded.
+            return pd.read_csv(path)
+        return pd.read_csv(path, dtype=dtypes, float_precision='round_trip')
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scoring-job')
+            self._pool.submit(self._run, job_id)
+
+    def pending(self):
+        return sum(1 for job in self.list() if job["status"] in ('queued', 'running'))
+
+    def submit(self, options, upload=None, input_path=None):
+        """Create a job from an uploaded file object or an existing CSV path; returns its status.
+
+        Raises OverflowError when too many jobs are already waiting.
+        """
+        self.prune()
+        if self.pending() >= self.max_pending:
+            raise OverflowError(f"Too many pending jobs (limit {self.max_pending})")
+
+        job_id = uuid.uuid4().hex
+        directory = self._dir(job_id)
+        os.makedirs(directory)
+        if upload is not None:
+            input_path = os.path.join(directory, INPUT_FILE)
+            upload.save(input_path)
+
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "input": os.path.abspath(input_path),
+            "options": {**options, "chunk_rows": int(options.get("chunk_rows") or self.chunk_rows)},
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "total_rows": None,
+            "rows_done": 0,
+            "run_seconds": 0.0,
+            "rows_per_sec": None,
+            "model_versions": [],
+            "resumed": 0,
+            "error": None,
+        }
+        self._write(job)
+        self._claim(job_id)
+        self._enqueue(job_id)
+        return self.describe(job)
+
+    def _run(self, job_id):
+        try:
+            job = self._read(job_id)
+            if job is None or job["status"] in FINISHED:
+                return
+            options = job["options"]
+            chunk_rows = options["chunk_rows"]
+            limit = int(options["limit"]) if options.get("limit") else None
+
+            parts = self._parts(job_id)
+            rows_done = sum(rows for _, rows in parts)
+            total = job["total_rows"]
+            if total is None:
+                total = count_rows(job["input"])
+                total = min(total, limit) if limit else total
+
+            version, score = self.make_scorer(options)
+            job = self._update(
+                job_id, status="running", started_at=job["started_at"] or time.time(), total_rows=total,
+                rows_done=rows_done, resumed=job["resumed"] + (1 if job["started_at"] else 0),
+                model_versions=job["model_versions"] + ([version] if version not in job["model_versions"] else []),
+            )
+            if job is None or job["status"] != "running":
+                return
+            run_started, run_rows, run_base = time.perf_counter(), 0, job["run_seconds"]
+
+            chunks = read_csv_chunks(job["input"], chunk_rows, limit, skip_rows=rows_done)
+            for index, chunk in enumerate(chunks, len(parts)):
+                if (self._read(job_id) or {}).get("status") != "running":
+                    return
+                scored = score(chunk)
+                self._write_part(job_id, index, scored)
+
+                rows_done += len(scored)
+                run_rows += len(scored)
+                elapsed = time.perf_counter() - run_started
+                job = self._update(
+                    job_id, rows_done=rows_done, total_rows=max(total, rows_done),
+                    run_seconds=run_base + elapsed, rows_per_sec=run_rows / elapsed if elapsed > 0 else None,
+                )
+                if job is None or job["status"] != "running":
+                    return
+
+            self._update(job_id, status="done", total_rows=rows_done, finished_at=time.time())
+        except Exception as e:
+            print(f"❌ Scoring job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            self._release(job_id)
+
+    def _adopt(self, job):
+        # An unfinished job nobody holds the lock for was orphaned by a dead process.
+        if job["status"] not in FINISHED and job["id"] not in self._claims and self._claim(job["id"]):
+            print(f"ℹ️ Resuming scoring job {job['id']} after {job['rows_done']} rows")
+            self._enqueue(job["id"])
+
+    def status(self, job_id):
+        job = self._read(job_id)
+        if job is None:
+            return None
+        self._adopt(job)
+        return self.describe(job)
+
+    def describe(self, job):
+        total, done, rate = job["total_rows"], job["rows_done"], job["rows_per_sec"]
+        eta = None
+        if job["status"] == "running" and rate and total is not None:
+            eta = max(total - done, 0) / rate
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "rows_done": done,
+            "total_rows": total,
+            "progress": done / total if total else (1.0 if job["status"] == "done" else 0.0),
+            "rows_per_sec": rate,
+            "eta_seconds": eta,
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "model": job["options"].get("model"),
+            "model_versions": job["model_versions"],
+            "resumed": job["resumed"],
+            "error": job["error"],
+        }
+
+    def list(self):
+        if not os.path.isdir(self.root):
+            return []
+        jobs = (self._read(name) for name in os.listdir(self.root))
+        return sorted((job for job in jobs if job is not None), key=lambda job: job["created_at"])
+
+    def resume_orphans(self):
+        for job in self.list():
+            self._adopt(job)
+
+    def results(self, job_id, offset=0, limit=1000):
+        """Rows ``[offset, offset + limit)`` of the spooled results and the next offset (None at the end)."""
+        job = self._read(job_id)
+        if job is None:
+            return None, None
+        frames, start = [], 0
+        for path, rows in self._parts(job_id):
+            end = start + rows
+            if end > offset and start < offset + limit:
+                frame = self._read_part(path)
+                frames.append(frame.iloc[max(offset - start, 0):offset + limit - start])
+            start = end
+        page = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        next_offset = offset + len(page)
+        if next_offset >= start and job["status"] in FINISHED:
+            next_offset = None
+        return page, next_offset
+
+    def delete(self, job_id):
+        """Cancel an unfinished job, or remove a finished one; None if it does not exist."""
+        job = self._read(job_id)
+        if job is None:
+            return None
+        if job["status"] not in FINISHED:
+            job = self._update(job_id, status="cancelled", finished_at=time.time())
+            # Removed meanwhile by prune() or another DELETE.
+            return self.describe(job) if job is not None else None
+        self._remove(job)
+        return self.describe(job)
+
+    def _remove(self, job):
+        shutil.rmtree(self._dir(job["id"]), ignore_errors=True)
+
+    def prune(self):
+        if self.retention_seconds <= 0:
+            return
+        cutoff = time.time() - self.retention_seconds
+        for job in self.list():
+            if job["status"] in FINISHED and (job["finished_at"] or 0) < cutoff:
+                self._remove(job)
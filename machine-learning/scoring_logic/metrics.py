@@ -0,0 +1,132 @@
+import bisect
+import os
+import resource
+import sys
+import threading
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 50000, 100000, 500000, 1000000)
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def resident_memory_bytes():
+    """Current RSS from /proc, or None where it is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_resident_memory_bytes():
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, n_buckets):
+        self.counts = [0] * (n_buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Process-local histograms and counters, rendered in Prometheus text format.
+
+    Observing is a bisect and three additions under one lock, cheap enough to
+    leave on for every request. Gauges that already live elsewhere (cache
+    stats, RSS) are read at scrape time through ``collector`` callbacks
+    returning ``(name, type, help, [(labels, value), ...])``. Each process
+    keeps its own numbers; under gunicorn every worker is scraped separately.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self.after_fork()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self._metrics[name] = {"type": "histogram", "help": help_text, "labels": tuple(labels),
+                               "buckets": tuple(buckets), "series": {}}
+
+    def counter(self, name, help_text, labels=()):
+        self._metrics[name] = {"type": "counter", "help": help_text, "labels": tuple(labels), "series": {}}
+
+    def collector(self, fn):
+        self._collectors.append(fn)
+        return fn
+
+    def observe(self, name, value, *label_values):
+        metric = self._metrics[name]
+        buckets = metric["buckets"]
+        with self._lock:
+            series = metric["series"].get(label_values)
+            if series is None:
+                series = metric["series"][label_values] = Histogram(len(buckets))
+            series.counts[bisect.bisect_left(buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+
+    def inc(self, name, *label_values, amount=1):
+        metric = self._metrics[name]
+        with self._lock:
+            metric["series"][label_values] = metric["series"].get(label_values, 0) + amount
+
+    def render(self):
+        lines = []
+        with self._lock:
+            snapshot = [
+                (name, metric, {key: (list(s.counts), s.sum, s.count) if isinstance(s, Histogram) else s
+                                for key, s in metric["series"].items()})
+                for name, metric in self._metrics.items()
+            ]
+        for name, metric, series in snapshot:
+            lines += [f"# HELP {name} {metric['help']}", f"# TYPE {name} {metric['type']}"]
+            for key, value in sorted(series.items()):
+                if metric["type"] == "counter":
+                    lines.append(f"{name}{_labels(metric['labels'], key)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(metric["buckets"] + (float('inf'),), counts):
+                    cumulative += n
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{name}_bucket{_labels(metric['labels'], key, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric['labels'], key)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(metric['labels'], key)} {count}")
+
+        for collect in self._collectors:
+            try:
+                collected = list(collect())
+            except Exception as e:
+                lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {_escape(e)}")
+                continue
+            for name, kind, help_text, samples in collected:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+        return '\n'.join(lines) + '\n'
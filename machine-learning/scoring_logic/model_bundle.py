@@ -0,0 +1,108 @@
+import threading
+import time
+
+import numpy as np
+
+from .batcher import MicroBatcher
+from .model_registry import ModelRegistry
+
+
+class ModelBundle:
+    """One loaded artifact set: feature pipeline, estimator and explainer.
+
+    A bundle is never mutated after it is built (the explainer is only
+    filled in lazily), so request handlers take a reference once and finish
+    on it even if a reload installs a newer bundle meanwhile.
+    """
+
+    def __init__(self, version, pipeline, feature_names, model=None, compiled=None, shared_explainer=None,
+                 source='pickle', explainer_factory=None, batching=None, model_loaders=None, bounds_info=None,
+                 segments=None, compiled_max_rows=64, unavailable_models=None):
+        self.version = version
+        self.loaded_at = time.time()
+        self.pipeline = pipeline
+        self.feature_names = feature_names
+        self.model = model
+        self.compiled = compiled
+        self.compiled_max_rows = compiled_max_rows
+        self.shared_explainer = shared_explainer
+        self.source = source
+        self.explainer_factory = explainer_factory
+        self.batching = batching
+        self.registry = ModelRegistry(model_loaders or {}, unavailable_models)
+        self.bounds_info = bounds_info or {}
+        self.segments = segments
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+        self.batcher = None
+        self.start_batcher()
+
+    def start_batcher(self):
+        if self.batching:
+            self.batcher = MicroBatcher(self.score_matrix, **self.batching)
+
+    def after_fork(self):
+        # Locks and threads do not survive fork; give the child its own.
+        self._explainer_lock = threading.Lock()
+        self.registry.after_fork()
+        self.start_batcher()
+
+    def prepare_worker(self):
+        # A forked scoring worker has no dispatcher thread, so it scores inline.
+        self.batcher = None
+        self._explainer_lock = threading.Lock()
+        self.registry.after_fork()
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+    def score_matrix(self, X):
+        # The compiled walk wins on a few rows; sklearn's per-tree loops win on batches.
+        if self.compiled is not None and (self.model is None or len(X) <= self.compiled_max_rows):
+            return self.compiled.predict_positive(X)
+        if hasattr(self.model, "predict_proba"):
+            return self.model.predict_proba(X)[:, 1]
+        return self.model.predict(X)
+
+    def score_rows(self, X):
+        if self.batcher is not None:
+            return self.batcher.submit(X)
+        return np.asarray(self.score_matrix(X), dtype=float)
+
+    def model_names(self):
+        return ["best", *self.registry.names()]
+
+    def scorer(self, name):
+        """Scoring function for ``name``; "best" is this bundle's own model."""
+        if name == "best":
+            return self.score_rows
+        return self.registry.get(name)
+
+    @property
+    def explainer_ready(self):
+        return self._explainer is not None
+
+    def explainer(self):
+        """The SHAP service for this bundle, built on first use."""
+        if self._explainer is None:
+            with self._explainer_lock:
+                if self._explainer is None and self.explainer_factory is not None:
+                    self._explainer = self.explainer_factory(self)
+        return self._explainer
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "source": self.source,
+            "n_features": self.pipeline.n_features,
+            "compiled": self.compiled is not None,
+            "compiled_max_rows": self.compiled_max_rows if self.compiled is not None else None,
+            "explainer_ready": self.explainer_ready,
+            "models": self.model_names(),
+            "models_loaded": ["best", *self.registry.loaded()],
+            "models_unavailable": self.registry.unavailable,
+            "iqr_bounds": {**self.bounds_info, "bounds": self.pipeline.iqr_bounds},
+            "segments": self.segments.describe() if self.segments is not None else None,
+        }
@@ -0,0 +1,75 @@
+import threading
+
+import joblib
+import numpy as np
+
+from .dense_net import DenseNet
+
+
+def sklearn_scorer(path):
+    model = joblib.load(path)
+    return lambda X: np.asarray(model.predict_proba(X)[:, 1], dtype=float)
+
+
+def dense_scorer(path):
+    # Weights exported from a .keras model by export_mlp.py; scored in NumPy, no TensorFlow.
+    return DenseNet.load(path).predict_positive
+
+
+class ModelUnavailable(Exception):
+    """A known model that cannot be served: its artifact is missing or failed to load."""
+
+
+class ModelRegistry:
+    """Alternative scoring models that share a bundle's feature pipeline.
+
+    ``loaders`` maps a model name to a zero-argument callable returning a
+    scorer (processed matrix -> positive-class probabilities). Each loader
+    runs on first use only, so models nobody asks for cost nothing.
+    ``unavailable`` maps models that cannot be served here to the reason;
+    they are not listed, and asking for one raises ModelUnavailable.
+    """
+
+    def __init__(self, loaders, unavailable=None):
+        self.loaders = dict(loaders)
+        self.unavailable = dict(unavailable or {})
+        self._scorers = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return list(self.loaders)
+
+    def loaded(self):
+        return [name for name in self.loaders if name in self._scorers]
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        if name in self.unavailable:
+            raise ModelUnavailable(f"Model '{name}' is not available: {self.unavailable[name]}")
+        if name not in self.loaders:
+            raise KeyError(name)
+        scorer = self._scorers.get(name)
+        if scorer is None:
+            with self._lock:
+                if name not in self._scorers:
+                    try:
+                        self._scorers[name] = self.loaders[name]()
+                    except Exception as e:
+                        # Not cached: the next request retries, e.g. once the hub is reachable again.
+                        raise ModelUnavailable(f"Model '{name}' could not be loaded: {e}") from e
+                scorer = self._scorers[name]
+        return scorer
+
+
+def cascade_scores(X, cheap, expensive, threshold=0.5, band=0.15):
+    """Score with ``cheap`` and re-score rows within ``band`` of ``threshold`` with ``expensive``.
+
+    Returns the scores and a boolean mask of the rows that were escalated.
+    """
+    scores = np.array(cheap(X), dtype=float)
+    escalated = np.abs(scores - threshold) < band
+    if escalated.any():
+        scores[escalated] = expensive(X[escalated])
+    return scores, escalated
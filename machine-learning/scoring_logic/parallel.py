@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+_owner = None
+_task = None
+_rebuild = None
+_forks_pool_workers = False
+
+
+def forked_pool_worker():
+    """True in a child forked by a process that runs a ShardPool, i.e. in a pool worker."""
+    return _forks_pool_workers
+
+
+class StaleOwner(Exception):
+    """A worker could not get the owner version a shard was sent for."""
+
+
+def _init_worker(owner, task, rebuild):
+    global _owner, _task, _rebuild
+    if owner is not None:
+        owner.prepare_worker()
+    _owner, _task, _rebuild = owner, task, rebuild
+
+
+def _run_shard(args):
+    global _owner
+    version, args = args[0], args[1:]
+    if _owner is None or _owner.version != version:
+        # Forked before the last reload: load the current artifacts, as a reloading server worker does.
+        _owner = _rebuild()
+        if _owner.version != version:
+            raise StaleOwner(f"worker loaded {_owner.version}, shard was sent for {version}")
+    return _task(_owner, *args)
+
+
+class SharedColumns:
+    """Input columns written once to a memory-mapped file that pool workers slice by row range.
+
+    Numeric columns are stored as float64; anything else as int32 codes
+    into its distinct values, which travel with each shard and come back as
+    a ``pandas.Categorical`` (missing values are code -1). Only the file
+    path, offsets and distinct values are pickled per shard, never rows.
+    """
+
+    def __init__(self, frame, fields, directory=None):
+        self.n_rows = len(frame)
+        self.layout = []
+        fd, self.path = tempfile.mkstemp(prefix='shards-', suffix='.bin', dir=directory)
+        offset = 0
+        with os.fdopen(fd, 'wb') as f:
+            for field in fields:
+                raw = frame[field]
+                if raw.dtype.kind in 'biuf':
+                    array, values = raw.to_numpy(dtype=np.float64), None
+                else:
+                    codes, uniques = pd.factorize(raw)
+                    array, values = codes.astype(np.int32), list(uniques)
+                f.write(array.tobytes())
+                self.layout.append((field, array.dtype.str, offset, values))
+                offset += array.nbytes
+
+    def slice(self, start, end):
+        """The columns of rows ``[start, end)`` as a dict, for ``FeaturePipeline.transform_columns``."""
+        data = np.memmap(self.path, mode='r') if self.n_rows else np.empty(0, dtype=np.uint8)
+        columns = {}
+        for field, dtype, offset, values in self.layout:
+            itemsize = np.dtype(dtype).itemsize
+            array = np.frombuffer(data, dtype=dtype, count=end - start, offset=offset + start * itemsize)
+            columns[field] = array if values is None else pd.Categorical.from_codes(array, values)
+        return columns
+
+    def close(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ShardPool:
+    """Scores large inputs in worker processes forked once per serving process.
+
+    ``start`` forks the workers and must run while the process has a single
+    thread (a gunicorn worker's post-fork hook, or before the dev server
+    starts), because a fork copies locks other threads hold. Workers inherit
+    ``owner`` (the loaded bundle) copy-on-write and hand it to
+    ``task(owner, *args)``; each shard carries the owner version it was
+    scored for, and a worker that holds an older one calls ``rebuild()`` to
+    load the current artifacts itself. Without ``start`` nothing is split.
+    """
+
+    def __init__(self, workers=0, shard_rows=20000, min_rows=50000):
+        self.workers = workers
+        self.shard_rows = shard_rows
+        self.min_rows = min_rows
+        self.after_fork()
+
+    def after_fork(self):
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self, owner, task, rebuild):
+        global _forks_pool_workers
+        with self._lock:
+            if self.workers <= 1 or self._pool is not None:
+                return
+            _forks_pool_workers = True
+            self._pool = multiprocessing.get_context('fork').Pool(
+                self.workers, initializer=_init_worker, initargs=(owner, task, rebuild),
+            )
+
+    def should_split(self, n_rows):
+        return self._pool is not None and n_rows >= max(self.min_rows, 2)
+
+    def shards(self, n_rows, shard_rows=None):
+        size = max(int(shard_rows or self.shard_rows), 1)
+        return [(start, min(start + size, n_rows)) for start in range(0, n_rows, size)]
+
+    def map(self, version, shard_args):
+        """``[task(owner, *args) for args in shard_args]`` with the ``version`` owner, in the workers, in order."""
+        return self._pool.map(_run_shard, [(version, *args) for args in shard_args], chunksize=1)
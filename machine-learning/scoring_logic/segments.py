@@ -0,0 +1,202 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SEGMENTS_FORMAT = 'segments'
+SEGMENTS_VERSION = 1
+
+# The clustering notebook's features, k search and cluster names (notebook/clustering.ipynb).
+SEGMENT_NUMERIC_COLS = ['age', 'balance', 'day', 'duration', 'campaign']
+SEGMENT_CATEGORICAL_COLS = ['job', 'marital', 'education', 'housing', 'loan']
+SEGMENT_K_RANGE = range(2, 10)
+# How the notebook's k=3 clusters were named, by their centroids in original units: the
+# cluster contacted most often in the campaign, then the older of the remaining two.
+# KMeans numbers clusters arbitrarily, so a refit is named by these rules, never by id.
+SEGMENT_RULES = [("Stable Productive", 'campaign'), ("High-Income Senior", 'age'), ("Responsive Young", None)]
+
+
+def export_segments(path, kmeans, preprocessor, labels, clustering=None):
+    """Write the clustering notebook's fitted KMeans and its ColumnTransformer as a segments artifact.
+
+    ``preprocessor`` must be the notebook's ('num' StandardScaler, 'cat'
+    OneHotEncoder) transformer, and ``labels`` maps cluster ids to names
+    (see ``name_clusters``). ``clustering`` records how k was chosen.
+    """
+    scaler = preprocessor.named_transformers_['num']
+    encoder = preprocessor.named_transformers_['cat']
+    if getattr(encoder, 'drop_idx_', None) is not None:
+        raise ValueError("Segment export expects a OneHotEncoder without dropped categories")
+
+    numeric_cols = [str(c) for c in scaler.feature_names_in_]
+    categorical_cols = [str(c) for c in encoder.feature_names_in_]
+    centroids = np.asarray(kmeans.cluster_centers_, dtype=np.float64)
+    width = len(numeric_cols) + sum(len(c) for c in encoder.categories_)
+    if centroids.shape[1] != width:
+        raise ValueError(f"Centroids have {centroids.shape[1]} features, the preprocessor produces {width}")
+
+    artifact = {
+        "format": SEGMENTS_FORMAT,
+        "version": SEGMENTS_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "labels": [str(labels[i]) for i in range(len(centroids))],
+        "numeric": {
+            "columns": numeric_cols,
+            "mean": (scaler.mean_ if scaler.mean_ is not None else np.zeros(len(numeric_cols))).tolist(),
+            "scale": (scaler.scale_ if scaler.scale_ is not None else np.ones(len(numeric_cols))).tolist(),
+        },
+        "categorical": {
+            "columns": categorical_cols,
+            "categories": [[str(v) for v in categories] for categories in encoder.categories_],
+        },
+        "centroids": centroids.tolist(),
+        "clustering": clustering,
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(artifact, f)
+    os.replace(tmp, path)
+    return artifact
+
+
+def name_clusters(kmeans, preprocessor):
+    """Map each cluster id to its segment name by the ``SEGMENT_RULES`` on its centroid."""
+    scaler = preprocessor.named_transformers_['num']
+    n_numeric = len(scaler.feature_names_in_)
+    centers = scaler.inverse_transform(np.asarray(kmeans.cluster_centers_)[:, :n_numeric])
+    profile = pd.DataFrame(centers, columns=[str(c) for c in scaler.feature_names_in_])
+    if len(profile) != len(SEGMENT_RULES):
+        raise ValueError(f"Segment names are defined for {len(SEGMENT_RULES)} clusters, got {len(profile)}")
+
+    names, remaining = {}, list(profile.index)
+    for name, feature in SEGMENT_RULES:
+        cluster = profile.loc[remaining, feature].idxmax() if feature else remaining[0]
+        names[int(cluster)] = name
+        remaining.remove(cluster)
+    return names
+
+
+def fit_segments(frame, n_clusters=None, random_state=42, k_range=SEGMENT_K_RANGE, sample_size=None):
+    """Refit the notebook's KMeans on ``frame``; returns (kmeans, preprocessor, cluster ids, clustering).
+
+    Without ``n_clusters`` k is picked as the notebook does, by the best
+    silhouette score over ``k_range`` (on ``sample_size`` rows if given,
+    since the exact score is quadratic in rows). ``clustering`` records the
+    k, how it was chosen and the scores, for ``export_segments``.
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.compose import ColumnTransformer
+    from sklearn.metrics import silhouette_score
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', StandardScaler(), SEGMENT_NUMERIC_COLS),
+        ('cat', OneHotEncoder(), SEGMENT_CATEGORICAL_COLS),
+    ])
+    X = preprocessor.fit_transform(frame[SEGMENT_NUMERIC_COLS + SEGMENT_CATEGORICAL_COLS])
+    if hasattr(X, 'toarray'):
+        X = X.toarray()
+
+    clustering = {"k": n_clusters, "selection": "fixed", "random_state": random_state}
+    if n_clusters is None:
+        scores = {}
+        for k in k_range:
+            clusters = KMeans(n_clusters=k, random_state=random_state, n_init=10).fit_predict(X)
+            scores[k] = float(silhouette_score(X, clusters, sample_size=sample_size, random_state=random_state))
+        n_clusters = max(scores, key=scores.get)
+        clustering.update(k=n_clusters, selection="silhouette", sample_size=sample_size,
+                          silhouette={str(k): score for k, score in scores.items()})
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+    return kmeans, preprocessor, kmeans.fit_predict(X), clustering
+
+
+def read_segments(path):
+    with open(path) as f:
+        artifact = json.load(f)
+    if artifact.get("format") != SEGMENTS_FORMAT:
+        raise ValueError(f"{path} is not a segments artifact")
+    if artifact.get("version") != SEGMENTS_VERSION:
+        raise ValueError(f"{path} has segments format version {artifact.get('version')}, expected {SEGMENTS_VERSION}")
+    return SegmentAssigner(artifact)
+
+
+class SegmentAssigner:
+    """Nearest-centroid segment assignment for the clustering notebook's KMeans.
+
+    The one-hot part of a row is never built: ``|x - c|^2`` is ranked as
+    ``|c|^2 - 2 x.c``, where the numeric part of ``x.c`` is one matrix
+    product and each categorical field adds the centroid weights of the
+    row's category by lookup. Unseen categories contribute nothing, as an
+    all-zero one-hot block would.
+    """
+
+    def __init__(self, artifact):
+        self.labels = np.array(artifact["labels"], dtype=str)
+        self.created_at = artifact.get("created_at")
+        self.clustering = artifact.get("clustering")
+        centroids = np.asarray(artifact["centroids"], dtype=np.float64)
+        k = len(centroids)
+        if len(self.labels) != k:
+            raise ValueError(f"{k} centroids but {len(self.labels)} labels")
+
+        self.numeric_cols = list(artifact["numeric"]["columns"])
+        self.mean = np.asarray(artifact["numeric"]["mean"], dtype=np.float64)
+        self.scale = np.asarray(artifact["numeric"]["scale"], dtype=np.float64)
+        n_numeric = len(self.numeric_cols)
+        self.numeric_centroids = centroids[:, :n_numeric].T
+
+        self.categorical_cols = list(artifact["categorical"]["columns"])
+        self.category_index = []
+        self.category_weights = []
+        offset = n_numeric
+        for categories in artifact["categorical"]["categories"]:
+            self.category_index.append({value: i for i, value in enumerate(categories)})
+            # The extra zero row stands in for categories the encoder never saw.
+            block = centroids[:, offset:offset + len(categories)].T
+            self.category_weights.append(np.vstack([block, np.zeros((1, k))]))
+            offset += len(categories)
+        if offset != centroids.shape[1]:
+            raise ValueError(f"Centroids have {centroids.shape[1]} features, the columns describe {offset}")
+
+        self.centroid_norms = (centroids ** 2).sum(axis=1)
+        self.fields = self.numeric_cols + self.categorical_cols
+
+    def _category_rows(self, slot, raw):
+        index = self.category_index[slot]
+        if hasattr(raw, 'categories'):
+            uniques = np.append(np.asarray(raw.categories, dtype=object).astype(str), 'nan')
+            inverse = np.where(raw.codes < 0, len(uniques) - 1, raw.codes)
+        else:
+            # Hash-based, so a column of strings is not sorted; missing values get code -1.
+            inverse, uniques = pd.factorize(np.asarray(raw, dtype=object))
+            uniques = np.append(np.asarray(uniques, dtype=object).astype(str), 'nan')
+            inverse = np.where(inverse < 0, len(uniques) - 1, inverse)
+        unseen = len(index)
+        lookup = np.array([index.get(str(value).strip(), unseen) for value in uniques], dtype=np.intp)
+        return lookup[inverse.reshape(-1)]
+
+    @staticmethod
+    def _numbers(raw):
+        values = np.asarray(raw)
+        if values.dtype.kind in 'biuf':
+            return values.astype(np.float64)
+        return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+
+    def assign_columns(self, columns):
+        """Segment label per row for a dict of equally long column arrays."""
+        numeric = np.column_stack([self._numbers(columns[col]) for col in self.numeric_cols])
+        # A missing number is treated as the training mean, i.e. 0 after scaling.
+        numeric = np.where(np.isnan(numeric), self.mean, numeric)
+        dots = ((numeric - self.mean) / self.scale) @ self.numeric_centroids
+        for slot, col in enumerate(self.categorical_cols):
+            dots += self.category_weights[slot][self._category_rows(slot, columns[col])]
+        return self.labels[np.argmin(self.centroid_norms - 2.0 * dots, axis=1)]
+
+    def assign_frame(self, df):
+        return self.assign_columns({col: df[col].to_numpy() for col in self.fields})
+
+    def describe(self):
+        return {"labels": self.labels.tolist(), "fields": self.fields, "created_at": self.created_at,
+                "clustering": self.clustering}
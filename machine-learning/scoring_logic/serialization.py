@@ -0,0 +1,98 @@
+import numpy as np
+
+RESULT_MIMETYPES = {
+    'json': 'application/json',
+    'split': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+STREAMABLE_FORMATS = ('ndjson', 'csv')
+COLUMNAR_MIMETYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'npz': 'application/x-npz',
+}
+JSON_DOUBLE_PRECISION = 15
+
+
+def arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def serialize_frame(df, output_format='json', header=True):
+    """Encode a scored frame column-wise; NaN becomes null (or an empty CSV cell)."""
+    if output_format == 'json':
+        return df.to_json(orient='records', double_precision=JSON_DOUBLE_PRECISION)
+    if output_format == 'split':
+        # {"columns": [...], "data": [[...], ...]} keeps key names out of every row.
+        return df.to_json(orient='split', index=False, double_precision=JSON_DOUBLE_PRECISION)
+    if output_format == 'ndjson':
+        if df.empty:
+            return ''
+        return df.to_json(orient='records', lines=True, double_precision=JSON_DOUBLE_PRECISION)
+    if output_format == 'csv':
+        return df.to_csv(index=False, header=header)
+    if output_format == 'arrow':
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Unsupported result format: {output_format}")
+
+
+def columnar_format(content_type):
+    """'arrow' or 'npz' for a columnar request body's content type, else None."""
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return next((name for name, value in COLUMNAR_MIMETYPES.items() if value == mimetype), None)
+
+
+def decode_columns(body, input_format):
+    """Column name -> array for an Arrow IPC stream or an ``.npz`` archive, without a copy where possible."""
+    if input_format == 'arrow':
+        import pyarrow as pa
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        columns = {}
+        for name, column in zip(table.column_names, table.columns):
+            column = column.combine_chunks()
+            if pa.types.is_dictionary(column.type):
+                columns[name.lower().strip()] = column.to_pandas().array
+            else:
+                columns[name.lower().strip()] = column.to_numpy(zero_copy_only=False)
+        return columns
+    if input_format == 'npz':
+        import io
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            return {name.lower().strip(): archive[name] for name in archive.files}
+    raise ValueError(f"Unsupported columnar format: {input_format}")
+
+
+def encode_columns(columns, output_format):
+    """Typed arrays back as an Arrow IPC stream or an ``.npz`` archive."""
+    if output_format == 'arrow':
+        import pyarrow as pa
+        table = pa.table({name: pa.array(values) for name, values in columns.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if output_format == 'npz':
+        import io
+        buffer = io.BytesIO()
+        np.savez(buffer, **columns)
+        return buffer.getvalue()
+    raise ValueError(f"Unsupported columnar format: {output_format}")
+
+
+def check_format(output_format, streaming=False):
+    allowed = STREAMABLE_FORMATS if streaming else tuple(RESULT_MIMETYPES)
+    if output_format not in allowed:
+        return f"Unsupported {'stream ' if streaming else ''}format: {output_format}"
+    if output_format == 'arrow' and not arrow_available():
+        return "Arrow format requires pyarrow to be installed"
+    return None
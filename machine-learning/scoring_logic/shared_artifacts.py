@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+
+def bundle_key(fingerprint, config=None):
+    """Directory name for a bundle: the source artifacts plus anything baked in at build time."""
+    payload = json.dumps({"version": FORMAT_VERSION, "fingerprint": fingerprint, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _dump(obj, directory, name):
+    arrays = {}
+    for field in obj.ARRAY_FIELDS:
+        filename = f"{name}.{field}.npy"
+        np.save(os.path.join(directory, filename), np.ascontiguousarray(getattr(obj, field)))
+        arrays[field] = filename
+    meta = {field: getattr(obj, field) for field in obj.META_FIELDS}
+    return {"class": type(obj).__name__, "arrays": arrays, "meta": meta}
+
+
+def _restore(cls, directory, entry, mmap_mode):
+    # Bypass __init__: everything it would derive from the fitted estimators is already here.
+    obj = cls.__new__(cls)
+    for field, filename in entry["arrays"].items():
+        setattr(obj, field, np.load(os.path.join(directory, filename), mmap_mode=mmap_mode))
+    for field, value in entry["meta"].items():
+        setattr(obj, field, value)
+    return obj
+
+
+def export_bundle(root, key, components, extra=None):
+    """Write ``components`` ({name: object}) under ``root/key``; returns the bundle directory.
+
+    The bundle is written to a temporary directory and renamed into place, so
+    readers never see a partial bundle and concurrent writers are harmless.
+    Bundles for other keys are removed; processes that still map their files
+    keep working because unlinked files stay valid while mapped.
+    """
+    target = os.path.join(root, key)
+    if os.path.exists(os.path.join(target, MANIFEST)):
+        return target
+
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".{key}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    manifest = {"format_version": FORMAT_VERSION, "key": key, "extra": extra or {}, "components": {}}
+    for name, obj in components.items():
+        manifest["components"][name] = _dump(obj, staging, name)
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+    try:
+        os.rename(staging, target)
+    except OSError:
+        # Another process published the same bundle first.
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for entry in os.listdir(root):
+        if entry != key and not entry.startswith('.'):
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return target
+
+
+def load_bundle(root, key, classes, mmap_mode='r'):
+    """Map a bundle written by ``export_bundle``; None if it is missing or from another format."""
+    directory = os.path.join(root, key)
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format_version") != FORMAT_VERSION or manifest.get("key") != key:
+        return None
+
+    by_name = {cls.__name__: cls for cls in classes}
+    components = {
+        name: _restore(by_name[entry["class"]], directory, entry, mmap_mode)
+        for name, entry in manifest["components"].items()
+    }
+    return {"directory": directory, "extra": manifest["extra"], **components}
+
+
+def bundle_nbytes(components):
+    return sum(
+        getattr(obj, field).nbytes for obj in components.values() if hasattr(obj, 'ARRAY_FIELDS')
+        for field in obj.ARRAY_FIELDS
+    )
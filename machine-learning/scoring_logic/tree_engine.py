@@ -0,0 +1,144 @@
+import numpy as np
+
+# Compiled probabilities agree with the estimator's predict_proba to within this
+# absolute tolerance; only the order of the per-tree summation differs.
+PROBA_TOLERANCE = 1e-9
+ROW_BLOCK = 1024
+
+
+def unwrap_estimator(model):
+    """Return the final estimator when every earlier pipeline step is a no-op at predict time."""
+    steps = getattr(model, 'steps', None)
+    if steps is None:
+        return model
+    for name, step in steps[:-1]:
+        if step is None or step == 'passthrough':
+            continue
+        # Samplers such as SMOTE only act during fit; anything that transforms X is unsupported.
+        if hasattr(step, 'fit_resample') and not hasattr(step, 'transform'):
+            continue
+        raise TypeError(f"Pipeline step '{name}' ({type(step).__name__}) transforms inputs at predict time")
+    return unwrap_estimator(steps[-1][1])
+
+
+class CompiledTreeEnsemble:
+    """A fitted tree ensemble flattened into contiguous node arrays.
+
+    Every tree is appended to the same ``feature``/``threshold``/``children``/
+    ``value`` arrays, leaves point at themselves, and prediction walks all
+    rows through all trees one level at a time.
+    """
+
+    ARRAY_FIELDS = ('feature', 'threshold', 'children', 'value', 'cover', 'roots')
+    META_FIELDS = ('kind', 'n_features', 'depth', 'offset', 'scale')
+
+    def __init__(self, trees, leaf_values, kind, n_features, offset=0.0, scale=1.0):
+        n_nodes = sum(t.node_count for t in trees)
+        self.feature = np.empty(n_nodes, dtype=np.intp)
+        self.threshold = np.empty(n_nodes, dtype=np.float64)
+        self.children = np.empty((n_nodes, 2), dtype=np.intp)
+        self.value = np.empty(n_nodes, dtype=np.float64)
+        self.cover = np.empty(n_nodes, dtype=np.float64)
+        self.roots = np.empty(len(trees), dtype=np.intp)
+
+        start = 0
+        for i, (tree, values) in enumerate(zip(trees, leaf_values)):
+            end = start + tree.node_count
+            own = np.arange(start, end)
+            is_leaf = tree.children_left == -1
+            self.feature[start:end] = np.where(is_leaf, 0, tree.feature)
+            self.threshold[start:end] = np.where(is_leaf, np.inf, tree.threshold)
+            self.children[start:end, 0] = np.where(is_leaf, own, tree.children_left + start)
+            self.children[start:end, 1] = np.where(is_leaf, own, tree.children_right + start)
+            self.value[start:end] = values
+            self.cover[start:end] = tree.weighted_n_node_samples
+            self.roots[i] = start
+            start = end
+
+        self.kind = kind
+        self.n_features = int(n_features)
+        self.depth = int(max(t.max_depth for t in trees))
+        self.offset = float(offset)
+        self.scale = float(scale)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value, self.cover, self.roots))
+
+    def _leaf_sum(self, X):
+        # sklearn trees split on float32 copies of the inputs.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat = X.ravel()
+        children = self.children.ravel()
+        row_start = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.depth):
+            go_right = flat[row_start + self.feature[node]] > self.threshold[node]
+            node = children[2 * node + go_right]
+        return self.value[node].sum(axis=1)
+
+    def predict_positive(self, X):
+        X = np.asarray(X)
+        out = np.empty(len(X))
+        for start in range(0, len(X), ROW_BLOCK):
+            block = X[start:start + ROW_BLOCK]
+            raw = self.offset + self.scale * self._leaf_sum(block)
+            out[start:start + ROW_BLOCK] = raw if self.kind == 'average' else 1.0 / (1.0 + np.exp(-raw))
+        return out
+
+    def predict_proba(self, X):
+        p = self.predict_positive(X)
+        return np.column_stack([1.0 - p, p])
+
+
+def _check_binary(estimator):
+    if len(estimator.classes_) != 2:
+        raise TypeError(f"Only binary classifiers are supported, got {len(estimator.classes_)} classes")
+
+
+def compile_tree_model(model):
+    """Flatten a supported tree ensemble; raises TypeError for anything else."""
+    from sklearn.ensemble import (
+        ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier,
+    )
+    from sklearn.tree import DecisionTreeClassifier
+
+    estimator = unwrap_estimator(model)
+    n_features = estimator.n_features_in_
+
+    if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+        _check_binary(estimator)
+        members = estimator.estimators_ if hasattr(estimator, 'estimators_') else [estimator]
+        trees = [m.tree_ for m in members]
+        leaf_values = []
+        for tree in trees:
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            totals[totals == 0] = 1.0
+            leaf_values.append(counts[:, 1] / totals)
+        return CompiledTreeEnsemble(trees, leaf_values, 'average', n_features, scale=1.0 / len(trees))
+
+    if isinstance(estimator, GradientBoostingClassifier):
+        _check_binary(estimator)
+        from sklearn.dummy import DummyClassifier
+        if isinstance(estimator.init_, str) and estimator.init_ == 'zero':
+            offset = 0.0
+        elif isinstance(estimator.init_, DummyClassifier):
+            offset = float(estimator._raw_predict_init(np.zeros((1, n_features)))[0, 0])
+        else:
+            raise TypeError(f"Unsupported GradientBoosting init estimator: {type(estimator.init_).__name__}")
+        # Fold the learning rate into the leaves so the ensemble is a plain sum.
+        trees = [stage[0].tree_ for stage in estimator.estimators_]
+        leaf_values = [estimator.learning_rate * tree.value[:, 0, 0] for tree in trees]
+        return CompiledTreeEnsemble(trees, leaf_values, 'logit', n_features, offset=offset)
+
+    raise TypeError(f"No compiled backend for {type(estimator).__name__}")
+
+
+def verify_compiled(compiled, model, n_features, n_rows=256, seed=0):
+    """Largest absolute gap between compiled and estimator probabilities on a random canary batch."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    X[:, n_features // 2:] = rng.integers(0, 2, size=(n_rows, n_features - n_features // 2))
+    expected = model.predict_proba(X)[:, 1]
+    return float(np.max(np.abs(compiled.predict_positive(X) - expected)))
@@ -1,7 +1,11 @@
-import shap
+import time
+
 import numpy as np
 
-from .shap_utils import build_explanation
+from .fast_tree_shap import FastTreeSHAP, MAX_PATH_SLOTS
+from .shap_utils import ExplanationBuilder
+from scoring_logic.result_cache import ResultCache, vector_key
+from scoring_logic.tree_engine import compile_tree_model
 
 def extract_tree_model(model):
     try:
@@ -19,23 +23,69 @@ def extract_tree_model(model):
     return model
 
 class LeadScoringSHAPService:
-    def __init__(self, model, feature_names):
+    def __init__(self, model, feature_names, fingerprint='', cache=None, explainer='shap', compiled=None, fast=None,
+                 max_slots=MAX_PATH_SLOTS):
         self.model = model
         self.feature_names = feature_names
+        self.fingerprint = fingerprint
+        self.cache = cache if cache is not None else ResultCache(capacity=0)
+        self.fast = fast
+        self.first_call_seconds = None
 
-        tree_model = extract_tree_model(model)
-        print(f"   ℹ️ Extracted model type for SHAP: {type(tree_model).__name__}")
-        self.explainer = shap.TreeExplainer(tree_model)
+        started = time.perf_counter()
+        if self.fast is None and explainer == 'fast':
+            try:
+                self.fast = FastTreeSHAP(compiled or compile_tree_model(model), len(feature_names), max_slots)
+            except (TypeError, ValueError) as e:
+                print(f"   ⚠️ Fast TreeSHAP unavailable, falling back to shap.TreeExplainer: {e}")
 
-        if isinstance(self.explainer.expected_value, list) or isinstance(self.explainer.expected_value, np.ndarray):
-            self.base_value = self.explainer.expected_value[1]
+        if self.fast is not None:
+            self.mode = 'fast'
+            self.base_value = self.fast.expected_value
         else:
-            self.base_value = self.explainer.expected_value
+            import shap
+
+            self.mode = 'shap'
+            tree_model = extract_tree_model(model)
+            print(f"   ℹ️ Extracted model type for SHAP: {type(tree_model).__name__}")
+            self.explainer = shap.TreeExplainer(tree_model)
+
+            if isinstance(self.explainer.expected_value, list) or isinstance(self.explainer.expected_value, np.ndarray):
+                # One value per class for forests, a single log-odds value for gradient boosting.
+                expected = np.ravel(self.explainer.expected_value)
+                self.base_value = expected[1] if len(expected) > 1 else expected[0]
+            else:
+                self.base_value = self.explainer.expected_value
+        self.startup_seconds = time.perf_counter() - started
 
-    def explain(self, X, single_data):
+        self.builder = ExplanationBuilder(feature_names)
+        print(f"   ✅ SHAP explainer ready ({self.mode}, {self.startup_seconds * 1000:.1f} ms)")
+
+    def stats(self):
+        stats = {
+            "mode": self.mode,
+            "startup_seconds": self.startup_seconds,
+            "first_call_seconds": self.first_call_seconds,
+        }
+        if self.fast is not None:
+            stats.update(paths=len(self.fast.leaf_value), path_width=self.fast.width, nbytes=self.fast.nbytes)
+        return stats
+
+    def shap_matrix(self, X):
         if isinstance(X, np.ndarray) and X.ndim == 1:
             X = X.reshape(1, -1)
 
+        started = time.perf_counter()
+        vals = self._shap_values(X)
+        if self.first_call_seconds is None:
+            self.first_call_seconds = time.perf_counter() - started
+            print(f"   ℹ️ First SHAP call ({self.mode}, {len(X)} rows): {self.first_call_seconds * 1000:.1f} ms")
+        return vals
+
+    def _shap_values(self, X):
+        if self.fast is not None:
+            return self.fast.shap_values(X)
+
         shap_values = self.explainer.shap_values(X)
 
         if isinstance(shap_values, list):
@@ -51,13 +101,35 @@ class LeadScoringSHAPService:
         else:
             vals = shap_values
 
-        shap_vals_row = np.array(vals).reshape(-1)
+        return np.asarray(vals).reshape(len(X), -1)
+
+    def explain(self, X, single_data, aggregate=None):
+        return self.explain_many(X, [single_data], aggregate=aggregate)[0]
+
+    def cached_shap_matrix(self, X):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names))
+        if not self.cache.enabled:
+            return self.shap_matrix(X)
+
+        keys = [vector_key(row, self.fingerprint) for row in X]
+        vals = np.empty(X.shape)
+        pending = []
+        for i, key in enumerate(keys):
+            hit = self.cache.get(key)
+            if hit is None:
+                pending.append(i)
+            else:
+                vals[i] = hit
+
+        if pending:
+            computed = self.shap_matrix(X[pending])
+            for i, row_vals in zip(pending, computed):
+                vals[i] = row_vals
+                self.cache.put(keys[i], row_vals.copy())
 
-        explained = build_explanation(
-            feature_names=self.feature_names,
-            shap_values=shap_vals_row,
-            base_value=self.base_value,
-            single_data=single_data
-        )
+        return vals
 
-        return explained
\ No newline at end of file
+    def explain_many(self, X, rows, top_k=5, include_all=True, aggregate=None):
+        vals = self.cached_shap_matrix(X)
+        return self.builder.build_many(vals, self.base_value, rows, top_k=top_k, include_all=include_all,
+                                       aggregate=aggregate)
@@ -138,122 +138,170 @@ def generate_narrative(raw, val, formatted_val, label, feature_value, context):
 
     return narrative
 
-def build_explanation(feature_names, shap_values, base_value, single_data):
-    base_prob = 1 / (1 + np.exp(-base_value)) * 100
+NUMERIC_COLS = ("age", "balance", "day", "duration", "campaign", "pdays", "previous")
+CAT_KEYS = ("job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome")
+FIELDS = NUMERIC_COLS + CAT_KEYS
+AGGREGATIONS = ("columns", "fields")
 
-    numeric_cols = {"age", "balance", "day", "duration", "campaign", "pdays", "previous"}
-    cat_keys = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
+def normalize_category(value):
+    return str(value).lower().replace('.', '').replace('-', '').replace(' ', '')
 
-    active_cats = {}
-    for k in cat_keys:
-        if k in single_data:
-            active_cats[k] = str(single_data[k]).lower()
+def get_feature_value_and_formatted(raw, cat_key, single_data):
+    val = None
+    formatted_val = ""
+    feature_value = ""
 
-    impacts = []
+    if raw in single_data:
+        val = single_data[raw]
+        formatted_val = fmt_val(val, raw)
+        if raw == 'age':
+            feature_value = f"{formatted_val} Years"
+        else:
+            feature_value = str(formatted_val)
+    elif cat_key and cat_key in single_data:
+        val = single_data[cat_key]
+        formatted_val = str(val)
+        feature_value = str(val).title()
 
-    for feature, shap_val in zip(feature_names, shap_values):
-        fname_norm = feature.lower()
+    return val, formatted_val, feature_value
 
-        is_active = False
-        matched_cat_key = None
+class ExplanationBuilder:
+    """Per-column labels and one-hot lookups resolved once per feature layout.
 
-        if fname_norm in numeric_cols:
-            is_active = True
-        else:
-            for cat, active_val in active_cats.items():
+    Impacts, the active-feature mask and the ranking are computed as matrices
+    over all rows; only the top entries are turned into narrative text.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        n_features = len(self.feature_names)
+
+        self.raw = [f.lower() for f in self.feature_names]
+        self.numeric_mask = np.array([raw in NUMERIC_COLS for raw in self.raw], dtype=bool)
+        self.cat_key = [None] * n_features
+        self.category_columns = {cat: {} for cat in CAT_KEYS}
+
+        for i, raw in enumerate(self.raw):
+            if self.numeric_mask[i]:
+                continue
+            for cat in CAT_KEYS:
                 prefix = f"{cat}_"
-                if fname_norm.startswith(prefix):
-                    matched_cat_key = cat
-                    suffix = fname_norm[len(prefix):]
-                    s_norm = suffix.replace('.', '').replace('-', '').replace(' ', '')
-                    v_norm = active_val.replace('.', '').replace('-', '').replace(' ', '')
-
-                    if s_norm == v_norm:
-                        is_active = True
+                if raw.startswith(prefix):
+                    self.cat_key[i] = cat
+                    suffix = normalize_category(raw[len(prefix):])
+                    self.category_columns[cat].setdefault(suffix, []).append(i)
                     break
 
-        if not is_active:
-            continue
-
-        impact_pct = shap_value_to_prob_delta(shap_val, base_value)
-        impacts.append({
-            "raw_feature": feature,
-            "shap_value": float(shap_val),
-            "impact_pct": float(impact_pct),
-            "cat_key": matched_cat_key
-        })
-
-    impacts_sorted = sorted(impacts, key=lambda x: abs(x["impact_pct"]), reverse=True)
-
-    def get_feature_value_and_formatted(raw, cat_key, single_data):
-        val = None
-        formatted_val = ""
-        feature_value = ""
-
-        if raw in single_data:
-            val = single_data[raw]
-            formatted_val = fmt_val(val, raw)
-            if raw == 'age':
-                feature_value = f"{formatted_val} Years"
+        # (n_columns, n_fields) 0/1 matrix: SHAP values @ grouping gives per-field attributions.
+        self.grouping = np.zeros((n_features, len(FIELDS)))
+        for i, raw in enumerate(self.raw):
+            field = raw if self.numeric_mask[i] else self.cat_key[i]
+            if field is not None:
+                self.grouping[i, FIELDS.index(field)] = 1.0
+        self.field_labels = [FEATURE_LABELS[f][0] if f in FEATURE_LABELS else f.title() for f in FIELDS]
+
+        self.labels = []
+        self.positive_context = []
+        self.negative_context = []
+        for feature, raw in zip(self.feature_names, self.raw):
+            if raw in FEATURE_LABELS:
+                label, positive, negative = FEATURE_LABELS[raw]
             else:
-                feature_value = str(formatted_val)
-        elif cat_key and cat_key in single_data:
-            val = single_data[cat_key]
-            formatted_val = str(val)
-            feature_value = str(val).title()
-
-        return val, formatted_val, feature_value
-
-    top_explanations = []
-    for item in impacts_sorted[:5]:
-        raw = item['raw_feature'].lower()
-        impact = item['impact_pct']
-        cat_key = item.get('cat_key')
-
-        if raw in FEATURE_LABELS:
-            label_data = FEATURE_LABELS[raw]
-            label = label_data[0]
-            context = label_data[1] if impact > 0 else label_data[2]
-            if context == 'N/A':
-                context = ""
+                label, positive, negative = feature.replace('_', ' ').title(), "", ""
+            self.labels.append(label)
+            self.positive_context.append("" if positive == 'N/A' else positive)
+            self.negative_context.append("" if negative == 'N/A' else negative)
+
+    def active_mask(self, rows):
+        mask = np.tile(self.numeric_mask, (len(rows), 1))
+        for r, row in enumerate(rows):
+            for cat, columns in self.category_columns.items():
+                if cat in row:
+                    hit = columns.get(normalize_category(row[cat]))
+                    if hit:
+                        mask[r, hit] = True
+        return mask
+
+    def _describe(self, column, field, row):
+        if column >= 0:
+            raw, cat_key, label = self.raw[column], self.cat_key[column], self.labels[column]
+            contexts = (self.positive_context[column], self.negative_context[column])
         else:
-            label = item['raw_feature'].replace('_', ' ').title()
-            context = ""
-
-        val, formatted_val, feature_value = get_feature_value_and_formatted(raw, cat_key, single_data)
-        narrative = generate_narrative(raw, val, formatted_val, label, feature_value, context)
-
-        top_explanations.append({
-            "feature": label,
-            "feature_value": feature_value,
-            "narrative": narrative,
-            "impact": impact,
-            "impact_pct": impact,
-            "direction": "positive" if impact > 0 else "negative",
-            "context": context,
-        })
-
-    all_impacts_simplified = []
-    for item in impacts_sorted:
-        raw = item['raw_feature'].lower()
-        cat_key = item.get('cat_key')
-
-        if raw in FEATURE_LABELS:
-            label = FEATURE_LABELS[raw][0]
+            # Category the encoder has never seen: no one-hot column to borrow wording from.
+            raw = cat_key = FIELDS[field]
+            label, contexts = self.field_labels[field], ("", "")
+        return raw, cat_key, label, contexts
+
+    def build_many(self, shap_matrix, base_value, rows, top_k=5, include_all=True, aggregate=None):
+        shap_matrix = np.asarray(shap_matrix, dtype=float).reshape(len(rows), -1)
+        base_prob = 1 / (1 + np.exp(-base_value)) * 100
+        active = self.active_mask(rows)
+
+        if aggregate == 'fields':
+            # Inactive one-hot columns carry SHAP mass too; summing per field keeps it.
+            values = shap_matrix @ self.grouping
+            hit = active[:, None, :] & (self.grouping.T > 0)
+            columns = np.where(hit.any(axis=2), hit.argmax(axis=2), -1)
+            active = np.ones(values.shape, dtype=bool)
         else:
-            label = item['raw_feature'].replace('_', ' ').title()
-
-        val, formatted_val, feature_value = get_feature_value_and_formatted(raw, cat_key, single_data)
-
-        all_impacts_simplified.append({
-            "feature": label,
-            "feature_value": feature_value,
-            "impact_pct": item['impact_pct']
-        })
-
-    return {
-        "base_value": float(base_value),
-        "base_prob_pct": float(base_prob),
-        "top_explanations": top_explanations,
-        "all_impacts": all_impacts_simplified
-    }
\ No newline at end of file
+            values = shap_matrix
+            columns = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+
+        impacts = shap_value_to_prob_delta(values, base_value)
+        magnitude = np.where(active, np.abs(impacts), -1.0)
+        n_active = active.sum(axis=1)
+
+        if include_all or top_k >= values.shape[1]:
+            order = np.argsort(-magnitude, axis=1, kind='stable')
+        else:
+            top = np.argpartition(-magnitude, top_k - 1, axis=1)[:, :top_k]
+            picked = np.take_along_axis(-magnitude, top, axis=1)
+            order = np.take_along_axis(top, np.argsort(picked, axis=1, kind='stable'), axis=1)
+
+        results = []
+        for r, row in enumerate(rows):
+            ranked = order[r, :n_active[r]]
+
+            top_explanations = []
+            for i in ranked[:top_k]:
+                impact = float(impacts[r, i])
+                raw, cat_key, label, contexts = self._describe(columns[r, i], i, row)
+                context = contexts[0] if impact > 0 else contexts[1]
+                val, formatted_val, feature_value = get_feature_value_and_formatted(raw, cat_key, row)
+                narrative = generate_narrative(raw, val, formatted_val, label, feature_value, context)
+
+                top_explanations.append({
+                    "feature": label,
+                    "feature_value": feature_value,
+                    "narrative": narrative,
+                    "impact": impact,
+                    "impact_pct": impact,
+                    "direction": "positive" if impact > 0 else "negative",
+                    "context": context,
+                })
+
+            explanation = {
+                "base_value": float(base_value),
+                "base_prob_pct": float(base_prob),
+                "top_explanations": top_explanations,
+            }
+            if include_all:
+                all_impacts = []
+                for i in ranked:
+                    raw, cat_key, label, _ = self._describe(columns[r, i], i, row)
+                    entry = {
+                        "feature": label,
+                        "feature_value": get_feature_value_and_formatted(raw, cat_key, row)[2],
+                        "impact_pct": float(impacts[r, i]),
+                    }
+                    if aggregate == 'fields':
+                        entry["field"] = FIELDS[i]
+                    all_impacts.append(entry)
+                explanation["all_impacts"] = all_impacts
+            results.append(explanation)
+
+        return results
+
+def build_explanation(feature_names, shap_values, base_value, single_data):
+    builder = ExplanationBuilder(feature_names)
+    return builder.build_many(np.asarray(shap_values).reshape(1, -1), base_value, [single_data])[0]
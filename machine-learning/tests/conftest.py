@@ -0,0 +1,73 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(ML_DIR, 'model')
+sys.path.insert(0, ML_DIR)
+
+from scoring_logic.feature_pipeline import FeaturePipeline  # noqa: E402
+
+# The bounds ml_api.py clips with when there is no iqr_bounds.json.
+IQR_BOUNDS = {
+    'age': {'lower': 18.0, 'upper': 70.0},
+    'balance': {'lower': -2203.0, 'upper': 3954.0},
+    'day': {'lower': -6.0, 'upper': 38.0},
+    'duration': {'lower': -268.5, 'upper': 643.5},
+    'campaign': {'lower': -2.0, 'upper': 6.0},
+    'pdays': {'lower': -1.0, 'upper': -1.0},
+    'previous': {'lower': 0.0, 'upper': 0.0},
+}
+
+
+@pytest.fixture(scope='session')
+def encoder():
+    return joblib.load(os.path.join(MODEL_DIR, 'onehot_encoder.pkl'))
+
+
+@pytest.fixture(scope='session')
+def scaler():
+    return joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+
+
+@pytest.fixture(scope='session')
+def feature_names():
+    # logreg.pkl is a plain file in git (BEST_MODEL.pkl is in LFS) and was fit on the same columns.
+    return [str(f) for f in joblib.load(os.path.join(MODEL_DIR, 'logreg.pkl')).feature_names_in_]
+
+
+@pytest.fixture(scope='session')
+def pipeline(encoder, scaler, feature_names):
+    return FeaturePipeline(encoder, scaler, IQR_BOUNDS, feature_names)
+
+
+def make_leads(encoder, n, seed=0):
+    """Raw leads with out-of-bounds numbers, pdays=999 and unknown or unseen categories."""
+    rng = np.random.default_rng(seed)
+    leads = {
+        'age': rng.integers(18, 95, n), 'balance': rng.integers(-5000, 50000, n), 'day': rng.integers(1, 32, n),
+        'duration': rng.integers(0, 3000, n), 'campaign': rng.integers(1, 30, n),
+        'pdays': rng.choice([-1, 999, 50, 200], n), 'previous': rng.integers(0, 10, n),
+    }
+    for col, categories in zip(encoder.feature_names_in_, encoder.categories_):
+        leads[col] = rng.choice(list(categories) + ['Unknown', 'not-a-category'], n)
+    return pd.DataFrame(leads)
+
+
+@pytest.fixture(scope='session')
+def leads(encoder):
+    return make_leads(encoder, 500)
+
+
+@pytest.fixture(scope='session')
+def forest(pipeline, encoder):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X = pipeline.transform_frame(make_leads(encoder, 2000, seed=1))
+    rng = np.random.default_rng(1)
+    y = (X[:, 3] + rng.normal(scale=0.5, size=len(X)) > 0.5).astype(int)
+    return RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y), X
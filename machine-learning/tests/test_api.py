@@ -0,0 +1,106 @@
+import importlib
+import os
+import shutil
+import sys
+
+import joblib
+import pytest
+
+from conftest import MODEL_DIR
+
+LEAD = {'age': 41, 'balance': 1200, 'duration': 310, 'campaign': 2, 'job': 'technician', 'housing': 'yes'}
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory, forest):
+    """ml_api loaded from a model directory holding a small forest in place of BEST_MODEL.pkl."""
+    model_dir = tmp_path_factory.mktemp('model')
+    joblib.dump(forest[0], model_dir / 'BEST_MODEL.pkl')
+    for name in ('scaler.pkl', 'onehot_encoder.pkl', 'logreg.pkl'):
+        shutil.copy(os.path.join(MODEL_DIR, name), model_dir / name)
+
+    with pytest.MonkeyPatch.context() as env:
+        # Everything is read at import; no artifact source, so nothing is fetched.
+        for name, value in {'MODEL_DIR': str(model_dir), 'JOBS_DIR': str(tmp_path_factory.mktemp('jobs')),
+                            'HF_REPO_ID': '', 'LOCAL_ARTIFACT_DIR': '', 'SHAP_WARMUP': 'lazy',
+                            'SHARED_ARTIFACTS': 'false', 'WHAT_IF_MAX_POINTS': '100'}.items():
+            env.setenv(name, value)
+        sys.modules.pop('ml_api', None)
+        module = importlib.import_module('ml_api')
+    yield module
+    sys.modules.pop('ml_api', None)
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
+
+
+def error(response, status):
+    assert response.status_code == status, response.get_json()
+    body = response.get_json()
+    assert body["success"] is False
+    return body["error"]
+
+
+def test_explain_batch(client):
+    response = client.post('/explain_batch', json={'leads': [LEAD, {**LEAD, 'age': 62}], 'top_k': 3})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert len(results) == 2 and all(0 <= r["prediction"] <= 1 for r in results)
+
+
+@pytest.mark.parametrize('payload, message', [
+    (None, "No leads provided"),
+    ({'leads': []}, "No leads provided"),
+    ({'leads': LEAD}, "No leads provided"),
+    ({'leads': [LEAD], 'top_k': 0}, "top_k"),
+    ({'leads': [LEAD], 'top_k': 'many'}, "invalid literal"),
+    ({'leads': [LEAD], 'model': 'logreg'}, "only available for model 'best'"),
+    ({'leads': [LEAD], 'aggregate': 'median'}, "Unsupported aggregate"),
+])
+def test_explain_batch_rejects(client, payload, message):
+    response = client.post('/explain_batch', json=payload) if payload is not None \
+        else client.post('/explain_batch', data='not json', content_type='application/json')
+    assert message in error(response, 400)
+
+
+def test_what_if(client):
+    response = client.post('/what_if', json={
+        'lead': LEAD, 'sweep': {'contact': 'all', 'duration': {'start': 0, 'stop': 600, 'step': 200}},
+        'explain_at': [{'duration': 400}],
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["features"] == ['contact', 'duration'] and body["values"]["duration"] == [0, 200, 400, 600]
+    assert body["shape"] == [len(body["values"]["contact"]), 4]
+    assert len(body["scores"]) == len(body["values"]["contact"]) and len(body["scores"][0]) == 4
+    assert body["explanations"][0]["point"] == {'duration': 400}
+
+
+@pytest.mark.parametrize('payload, message', [
+    ({'sweep': {'age': [30, 40]}}, "Provide a 'lead' object"),
+    ({'lead': LEAD}, "Provide 'sweep'"),
+    ({'lead': LEAD, 'sweep': {'salary': [1, 2]}}, "Unknown feature 'salary'"),
+    ({'lead': LEAD, 'sweep': {'age': []}}, "must be a non-empty list"),
+    ({'lead': LEAD, 'sweep': {'age': ['old']}}, "is not a number"),
+    ({'lead': LEAD, 'sweep': {'job': [3]}}, "is not a category name"),
+    ({'lead': LEAD, 'sweep': {'age': 'all'}}, "only applies to categorical"),
+    ({'lead': LEAD, 'sweep': {'job': {'start': 0, 'stop': 3}}}, "Ranges only apply to numeric"),
+    ({'lead': LEAD, 'sweep': {'age': {'start': 60, 'stop': 20}}}, "start <= stop"),
+    ({'lead': LEAD, 'sweep': {'age': {'start': 0, 'stop': 1000}}}, "limit 100"),
+    ({'lead': LEAD, 'sweep': {'age': list(range(20, 40)), 'day': list(range(1, 11))}}, "Sweep has 200 points"),
+    ({'lead': LEAD, 'sweep': {'age': [30]}, 'explain_at': [{'day': 3}]}, "can only set swept features"),
+    ({'lead': LEAD, 'sweep': {'age': [30]}, 'explain_at': [{'age': 30}], 'model': 'logreg'},
+     "only available for model 'best'"),
+    ({'lead': LEAD, 'sweep': {'age': [30]}, 'top_k': -1}, "'top_k' must be a positive integer"),
+    ({'lead': LEAD, 'sweep': {'age': [30]}, 'model': 'xgboost'}, "Unknown model 'xgboost'"),
+])
+def test_what_if_rejects(client, payload, message):
+    assert message in error(client.post('/what_if', json=payload), 400)
+
+
+def test_what_if_with_a_model_that_cannot_be_loaded(client):
+    # The test model directory has no mlp.npz and there is no artifact source.
+    response = client.post('/what_if', json={'lead': LEAD, 'sweep': {'age': [30]}, 'model': 'mlp'})
+    assert "mlp.npz" in error(response, 503)
@@ -0,0 +1,48 @@
+import copy
+
+from benchmark import compare, median_report
+
+BASELINE = {
+    "startup": {"seconds": 2.0, "stages": {"model": 1.0}},
+    "load_artifacts": {"seconds": 1.0},
+    "process_csv_logic": {"1000": {"rows": 1000, "seconds": 0.1, "rows_per_sec": 10000.0}},
+    "predict_single": {"requests": 300, "p50_ms": 2.0, "p99_ms": 5.0, "mean_ms": 2.2},
+    "peak_rss_mb": {"total": 400.0},
+}
+TOLERANCES = {"default": 0.10, "tail": 0.50, "startup": 0.50}
+
+
+def scaled(report, changes):
+    report = copy.deepcopy(report)
+    for name, factor in changes.items():
+        *sections, metric = name.split('.')
+        target = report
+        for key in sections:
+            target = target[key]
+        target[metric] *= factor
+    return report
+
+
+def test_noisy_metrics_get_their_own_tolerance():
+    noisy = scaled(BASELINE, {"startup.seconds": 1.4, "load_artifacts.seconds": 1.3, "predict_single.p99_ms": 1.4})
+    assert compare(noisy, BASELINE, TOLERANCES) == []
+
+    slow = scaled(BASELINE, {"startup.seconds": 1.6, "predict_single.p99_ms": 1.6})
+    assert compare(slow, BASELINE, TOLERANCES) == ["predict_single.p99_ms", "startup.seconds"]
+
+
+def test_throughput_and_median_keep_the_default_tolerance():
+    slower = scaled(BASELINE, {"process_csv_logic.1000.rows_per_sec": 0.85, "predict_single.p50_ms": 1.15,
+                               "peak_rss_mb.total": 1.2})
+    assert compare(slower, BASELINE, TOLERANCES) == [
+        "peak_rss_mb.total", "predict_single.p50_ms", "process_csv_logic.1000.rows_per_sec",
+    ]
+    faster = scaled(BASELINE, {"process_csv_logic.1000.rows_per_sec": 2.0, "predict_single.p50_ms": 0.5})
+    assert compare(faster, BASELINE, TOLERANCES) == []
+
+
+def test_several_baselines_are_compared_by_median():
+    runs = [scaled(BASELINE, {"predict_single.p50_ms": factor}) for factor in (1.0, 1.05, 3.0)]
+    baseline = median_report(runs)
+    assert baseline["predict_single.p50_ms"] == 2.1
+    assert compare(scaled(BASELINE, {"predict_single.p50_ms": 1.1}), baseline, TOLERANCES) == []
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+from shap_logic.fast_tree_shap import FastTreeSHAP, path_slots
+from shap_logic.shap_service import LeadScoringSHAPService
+from scoring_logic.tree_engine import compile_tree_model
+
+
+@pytest.mark.parametrize('make_model', [
+    lambda: RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0),
+    lambda: RandomForestClassifier(n_estimators=5, max_depth=10, max_features=None, random_state=0),
+    lambda: GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0),
+], ids=['rf', 'rf-repeated-features', 'gb'])
+def test_matches_shap_tree_explainer(forest, pipeline, make_model):
+    _, X = forest
+    y = (X[:, 3] + X[:, 0] > 0.5).astype(int)
+    model = make_model().fit(X, y)
+    fast = FastTreeSHAP(compile_tree_model(model), X.shape[1])
+    reference = LeadScoringSHAPService(model, pipeline.feature_names, explainer='shap')
+
+    rows = X[:40]
+    expected = reference.shap_matrix(rows)
+    actual = fast.shap_values(rows)
+    # The quadrature runs in float32.
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-5)
+    assert fast.expected_value == pytest.approx(reference.base_value, abs=1e-6)
+    # Local accuracy: base value plus attributions is the model output.
+    margin = model.predict_proba(rows)[:, 1] if isinstance(model, RandomForestClassifier) \
+        else model.decision_function(rows)
+    np.testing.assert_allclose(fast.expected_value + actual.sum(axis=1), margin, rtol=0, atol=1e-5)
+
+
+def test_refuses_ensembles_above_the_slot_limit(forest):
+    model, X = forest
+    compiled = compile_tree_model(model)
+    slots = path_slots(compiled, X.shape[1])
+    assert FastTreeSHAP(compiled, X.shape[1], max_slots=slots).width >= 1
+    with pytest.raises(ValueError, match="path slots"):
+        FastTreeSHAP(compiled, X.shape[1], max_slots=slots - 1)
+
+
+def test_service_defaults_to_shap_and_falls_back(forest, pipeline):
+    model, X = forest
+    assert LeadScoringSHAPService(model, pipeline.feature_names).mode == 'shap'
+    assert LeadScoringSHAPService(model, pipeline.feature_names, explainer='fast').mode == 'fast'
+
+    refused = LeadScoringSHAPService(model, pipeline.feature_names, explainer='fast', max_slots=10)
+    assert refused.mode == 'shap'
+    fast = LeadScoringSHAPService(model, pipeline.feature_names, explainer='fast')
+    np.testing.assert_allclose(refused.shap_matrix(X[:5]), fast.shap_matrix(X[:5]), rtol=0, atol=1e-5)
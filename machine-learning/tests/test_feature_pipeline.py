@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import IQR_BOUNDS
+from scoring_logic.feature_pipeline import CATEGORICAL_COLS, NUMERIC_COLS, NUMERIC_SCALER_ORDER
+
+
+def pandas_chain(df, encoder, scaler, feature_names):
+    """The replace/fillna/clip/encode/scale/reindex chain FeaturePipeline replaced."""
+    X_raw = df[NUMERIC_COLS + CATEGORICAL_COLS].copy()
+    X_raw = X_raw.replace('unknown', np.nan).replace('Unknown', np.nan)
+    for col in NUMERIC_COLS:
+        X_raw[col] = X_raw[col].fillna(-1 if col == 'pdays' else 0)
+    for col in CATEGORICAL_COLS:
+        X_raw[col] = X_raw[col].fillna('unknown')
+    X_raw['pdays'] = X_raw['pdays'].replace(999, -1)
+    for col in NUMERIC_COLS:
+        lower, upper = IQR_BOUNDS[col]['lower'], IQR_BOUNDS[col]['upper']
+        X_raw[col] = np.where(X_raw[col] < lower, lower, np.where(X_raw[col] > upper, upper, X_raw[col]))
+
+    encoded = encoder.transform(X_raw[CATEGORICAL_COLS])
+    encoded = pd.DataFrame(encoded, columns=encoder.get_feature_names_out(CATEGORICAL_COLS), index=X_raw.index)
+    X = pd.concat([X_raw[NUMERIC_COLS], encoded], axis=1)
+    X[NUMERIC_SCALER_ORDER] = scaler.transform(X[NUMERIC_SCALER_ORDER])
+    return X[feature_names].to_numpy()
+
+
+def test_transform_frame_matches_pandas_chain(pipeline, leads, encoder, scaler, feature_names):
+    expected = pandas_chain(leads, encoder, scaler, feature_names)
+    np.testing.assert_allclose(pipeline.transform_frame(leads), expected, rtol=0, atol=1e-12)
+
+
+def test_transform_records_matches_transform_frame(pipeline, leads):
+    records = leads.head(50).to_dict('records')
+    np.testing.assert_array_equal(pipeline.transform_records(records), pipeline.transform_frame(leads.head(50)))
+
+
+def test_transform_columns_accepts_categoricals(pipeline, leads):
+    columns = {col: leads[col].to_numpy() for col in pipeline.fields}
+    for col in CATEGORICAL_COLS:
+        columns[col] = pd.Categorical(leads[col])
+    np.testing.assert_array_equal(pipeline.transform_columns(columns), pipeline.transform_frame(leads))
+
+
+def test_missing_numbers_are_filled(pipeline, leads, encoder, scaler, feature_names):
+    lead = leads.head(1).astype(object)
+    lead.loc[lead.index[0], ['age', 'pdays']] = 'unknown'
+    expected = leads.head(1).copy()
+    expected.loc[expected.index[0], ['age', 'pdays']] = [0, -1]
+    np.testing.assert_allclose(pipeline.transform_records(lead.to_dict('records')),
+                               pandas_chain(expected, encoder, scaler, feature_names), atol=1e-12)
+
+
+def test_unreadable_number_is_rejected(pipeline, leads):
+    record = {**leads.iloc[0].to_dict(), 'balance': 'lots'}
+    with pytest.raises(ValueError, match="balance"):
+        pipeline.transform_records([record])
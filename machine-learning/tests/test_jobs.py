@@ -0,0 +1,155 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring_logic.jobs import FINISHED, JobManager
+
+
+def write_input(path, n_rows=35):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'age': rng.integers(18, 90, n_rows),
+        'balance': rng.normal(1000, 500, n_rows),
+        'job': rng.choice(['admin.', 'retired', 'student'], n_rows),
+    })
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def score(chunk):
+    chunk['ml_score'] = 1.0 / (1.0 + np.exp(-chunk['balance'] / 997.0))
+    return chunk
+
+
+class Scorer:
+    """make_scorer for JobManager that records the rows it scores and can be held mid-job."""
+
+    def __init__(self, hold=False):
+        self.rows = []
+        self.started = threading.Event()
+        self.resume = threading.Event()
+        if not hold:
+            self.resume.set()
+
+    def __call__(self, options):
+        def run(chunk):
+            self.rows.append(chunk['age'].tolist())
+            self.started.set()
+            self.resume.wait(10)
+            return score(chunk)
+        return 'v1', run
+
+
+def wait(manager, job_id, statuses=FINISHED, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.status(job_id)
+        if job is None or job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def released(manager, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while job_id in manager._claims and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def all_results(manager, job_id):
+    page, next_offset = manager.results(job_id, 0, 10_000)
+    assert next_offset is None
+    return page
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    path = tmp_path / 'leads.csv'
+    return str(path), write_input(path)
+
+
+def test_results_read_back_as_scored(tmp_path, input_csv):
+    path, frame = input_csv
+    manager = JobManager(str(tmp_path / 'jobs'), Scorer(), chunk_rows=10)
+    job = manager.submit({}, input_path=path)
+
+    done = wait(manager, job["job_id"])
+    assert done["status"] == "done"
+    assert (done["rows_done"], done["total_rows"], done["progress"]) == (35, 35, 1.0)
+
+    expected = score(frame.copy())
+    pd.testing.assert_frame_equal(all_results(manager, job["job_id"]), expected)
+    page, next_offset = manager.results(job["job_id"], 8, 5)
+    pd.testing.assert_frame_equal(page, expected.iloc[8:13].reset_index(drop=True))
+    assert next_offset == 13
+
+
+def test_cancel_stops_after_the_current_chunk(tmp_path, input_csv):
+    path, _ = input_csv
+    scorer = Scorer(hold=True)
+    manager = JobManager(str(tmp_path / 'jobs'), scorer, chunk_rows=10)
+    job_id = manager.submit({}, input_path=path)["job_id"]
+    assert scorer.started.wait(10)
+
+    assert manager.delete(job_id)["status"] == "cancelled"
+    scorer.resume.set()
+    # The worker finishes the chunk it holds, sees the cancellation and releases the job.
+    released(manager, job_id)
+    job = manager.status(job_id)
+    assert job["status"] == "cancelled"
+    assert len(scorer.rows) == 1 and job["rows_done"] <= 10
+
+    # A second DELETE removes the finished job.
+    assert manager.delete(job_id)["status"] == "cancelled"
+    assert manager.status(job_id) is None
+    assert manager.delete(job_id) is None
+
+
+def test_delete_of_a_job_removed_meanwhile_is_not_found(tmp_path, input_csv, monkeypatch):
+    path, _ = input_csv
+    scorer = Scorer(hold=True)
+    manager = JobManager(str(tmp_path / 'jobs'), scorer, chunk_rows=10)
+    job_id = manager.submit({}, input_path=path)["job_id"]
+    assert scorer.started.wait(10)
+
+    update = manager._update
+
+    def removed_first(job_id, **changes):
+        # prune() or another process's DELETE wins the race between the read and the update.
+        manager._remove({"id": job_id})
+        return update(job_id, **changes)
+
+    monkeypatch.setattr(manager, '_update', removed_first)
+    assert manager.delete(job_id) is None
+    monkeypatch.undo()
+    scorer.resume.set()
+    released(manager, job_id)
+
+
+def test_orphaned_job_resumes_after_the_spooled_parts(tmp_path, input_csv):
+    path, frame = input_csv
+    root = str(tmp_path / 'jobs')
+    dead = JobManager(root, Scorer(), chunk_rows=10)
+    # Submitted and claimed by a process that scores one chunk and dies.
+    dead._enqueue = lambda job_id: None
+    job_id = dead.submit({}, input_path=path)["job_id"]
+    dead._write_part(job_id, 0, score(frame.head(10).copy()))
+    dead._update(job_id, status="running", started_at=time.time(), total_rows=35, rows_done=10,
+                 model_versions=['v1'])
+
+    scorer = Scorer()
+    survivor = JobManager(root, scorer, chunk_rows=10)
+    # The lock is still held, so the job is left alone.
+    survivor.resume_orphans()
+    assert scorer.rows == [] and survivor.status(job_id)["status"] == "running"
+
+    dead._release(job_id)
+    survivor.resume_orphans()
+    job = wait(survivor, job_id)
+    assert job["status"] == "done" and job["resumed"] == 1 and job["rows_done"] == 35
+    # Only the rows after the spooled part were parsed and scored.
+    assert scorer.rows == [frame['age'].tolist()[i:i + 10] for i in (10, 20, 30)]
+    pd.testing.assert_frame_equal(all_results(survivor, job_id), score(frame.copy()))
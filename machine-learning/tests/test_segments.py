@@ -0,0 +1,92 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring_logic.segments import (
+    SEGMENT_CATEGORICAL_COLS, SEGMENT_NUMERIC_COLS, SEGMENT_RULES, export_segments, fit_segments, name_clusters,
+    read_segments,
+)
+
+# Cluster means from notebook/clustering.ipynb, with the names it gave them.
+PROFILES = {
+    "Stable Productive": {'age': 40, 'balance': 1120, 'day': 22, 'duration': 159, 'campaign': 14},
+    "High-Income Senior": {'age': 52, 'balance': 1996, 'day': 16, 'duration': 247, 'campaign': 2.4},
+    "Responsive Young": {'age': 34, 'balance': 979, 'day': 15, 'duration': 272, 'campaign': 2.2},
+}
+SHARES = [0.05, 0.37, 0.58]
+SPREAD = {'age': 4, 'balance': 300, 'day': 3, 'duration': 40, 'campaign': 1.5}
+
+
+def customers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    names = list(PROFILES)
+    group = rng.choice(len(names), n, p=SHARES)
+    frame = pd.DataFrame({
+        col: np.array([PROFILES[name][col] for name in names])[group] + rng.normal(0, SPREAD[col], n)
+        for col in SEGMENT_NUMERIC_COLS
+    })
+    frame['job'] = rng.choice(['admin.', 'technician', 'retired', 'student'], n)
+    frame['marital'] = rng.choice(['married', 'single', 'divorced'], n)
+    frame['education'] = rng.choice(['primary', 'secondary', 'tertiary'], n)
+    frame['housing'] = rng.choice(['yes', 'no'], n)
+    frame['loan'] = rng.choice(['yes', 'no'], n)
+    return frame, np.array(names)[group]
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    frame, truth = customers(3000)
+    kmeans, preprocessor, clusters, clustering = fit_segments(frame, n_clusters=3)
+    return frame, truth, kmeans, preprocessor, clusters, clustering
+
+
+def test_assigner_matches_kmeans_predict(tmp_path, fitted):
+    frame, _, kmeans, preprocessor, _, clustering = fitted
+    labels = name_clusters(kmeans, preprocessor)
+    path = str(tmp_path / 'segments.json')
+    export_segments(path, kmeans, preprocessor, labels, clustering)
+    assigner = read_segments(path)
+
+    leads, _ = customers(1000, seed=1)
+    # Unseen categories and missing values.
+    leads.loc[:9, 'job'] = 'astronaut'
+    leads.loc[10:19, 'balance'] = np.nan
+    leads.loc[20:29, 'marital'] = None
+
+    # The assigner treats an unseen category as an all-zero one-hot block and a missing number as the mean.
+    reference = copy.deepcopy(preprocessor)
+    reference.named_transformers_['cat'].handle_unknown = 'ignore'
+    mean_balance = reference.named_transformers_['num'].mean_[SEGMENT_NUMERIC_COLS.index('balance')]
+    X = reference.transform(leads[SEGMENT_NUMERIC_COLS + SEGMENT_CATEGORICAL_COLS].fillna({'balance': mean_balance}))
+    expected = np.array([labels[c] for c in kmeans.predict(X)])
+    np.testing.assert_array_equal(assigner.assign_frame(leads), expected)
+
+    columns = {col: leads[col].to_numpy() for col in assigner.fields}
+    columns['job'] = pd.Categorical(leads['job'])
+    np.testing.assert_array_equal(assigner.assign_columns(columns), expected)
+    assert assigner.describe()["clustering"] == clustering
+
+
+def test_clusters_are_named_by_their_centroids(fitted):
+    frame, truth, kmeans, preprocessor, clusters, _ = fitted
+    labels = name_clusters(kmeans, preprocessor)
+    assert sorted(labels.values()) == sorted(name for name, _ in SEGMENT_RULES)
+    assert np.mean(np.array([labels[c] for c in clusters]) == truth) > 0.99
+
+    # A refit that numbers the clusters differently still gets the same names.
+    refit, refit_preprocessor, refit_clusters, _ = fit_segments(frame, n_clusters=3, random_state=1)
+    refit_labels = name_clusters(refit, refit_preprocessor)
+    assert np.mean(np.array([refit_labels[c] for c in refit_clusters]) == truth) > 0.99
+
+
+def test_k_is_chosen_by_silhouette_and_recorded(fitted):
+    frame = fitted[0]
+    kmeans, preprocessor, _, clustering = fit_segments(frame, k_range=range(2, 6), sample_size=1000)
+    assert clustering["selection"] == "silhouette" and clustering["k"] == kmeans.n_clusters == 3
+    assert max(clustering["silhouette"], key=clustering["silhouette"].get) == "3"
+
+    four, preprocessor, _, _ = fit_segments(frame, n_clusters=4)
+    with pytest.raises(ValueError, match="defined for 3 clusters"):
+        name_clusters(four, preprocessor)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from scoring_logic.model_bundle import ModelBundle
+from scoring_logic.tree_engine import PROBA_TOLERANCE, compile_tree_model, verify_compiled
+
+
+@pytest.mark.parametrize('make_model', [
+    lambda: RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0),
+    lambda: RandomForestClassifier(n_estimators=5, min_samples_leaf=1, random_state=0),
+    lambda: ExtraTreesClassifier(n_estimators=10, max_depth=6, random_state=0),
+    lambda: GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+    lambda: GradientBoostingClassifier(n_estimators=10, init='zero', random_state=0),
+    lambda: Pipeline([('smote', SMOTE(random_state=0)),
+                      ('rf', RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0))]),
+], ids=['rf', 'rf-full-depth', 'extra-trees', 'gb', 'gb-zero-init', 'smote-pipeline'])
+def test_compiled_matches_predict_proba(forest, make_model):
+    _, X = forest
+    y = (X[:, 3] > 0.5).astype(int)
+    model = make_model().fit(X, y)
+    compiled = compile_tree_model(model)
+
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=PROBA_TOLERANCE)
+    # Rows exactly on a split threshold go the same way as in sklearn.
+    on_split = np.tile(X[:1], (len(compiled.threshold), 1))
+    splits = np.isfinite(compiled.threshold)
+    on_split[np.flatnonzero(splits), compiled.feature[splits]] = compiled.threshold[splits]
+    np.testing.assert_allclose(compiled.predict_positive(on_split), model.predict_proba(on_split)[:, 1],
+                               rtol=0, atol=PROBA_TOLERANCE)
+    assert verify_compiled(compiled, model, X.shape[1]) <= PROBA_TOLERANCE
+
+
+def test_unsupported_models_are_refused(forest):
+    _, X = forest
+    with pytest.raises(TypeError, match="transforms inputs"):
+        compile_tree_model(Pipeline([('scale', StandardScaler()), ('rf', forest[0])]))
+    multiclass = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, np.arange(len(X)) % 3)
+    with pytest.raises(TypeError, match="binary"):
+        compile_tree_model(multiclass)
+
+
+class CountingCompiled:
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.rows = []
+
+    def predict_positive(self, X):
+        self.rows.append(len(X))
+        return self.compiled.predict_positive(X)
+
+
+def test_bundle_uses_compiled_only_for_small_batches(forest, pipeline):
+    model, X = forest
+    compiled = CountingCompiled(compile_tree_model(model))
+    bundle = ModelBundle('test', pipeline, pipeline.feature_names, model=model, compiled=compiled,
+                         compiled_max_rows=64)
+
+    expected = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(bundle.score_matrix(X[:64]), expected[:64], rtol=0, atol=PROBA_TOLERANCE)
+    np.testing.assert_allclose(bundle.score_matrix(X[:65]), expected[:65], rtol=0, atol=0)
+    assert compiled.rows == [64]
+
+    # Without the estimator (a shared bundle) everything goes through the compiled arrays.
+    bundle = ModelBundle('test', pipeline, pipeline.feature_names, compiled=compiled, compiled_max_rows=64)
+    bundle.score_matrix(X[:500])
+    assert compiled.rows == [64, 500]
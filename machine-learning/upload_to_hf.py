@@ -1,5 +1,9 @@
 import os
-from huggingface_hub import HfApi, create_repo
+import sys
+from huggingface_hub import CommitOperationAdd, HfApi, create_repo
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scoring_logic.artifact_store import MANIFEST_NAME, build_manifest, write_manifest
 
 REPO_ID = input("Enter your Hugging Face Repo ID (e.g., username/model-name): ").strip()
 TOKEN = os.getenv("HF_TOKEN") or input("Enter your Hugging Face Write Token: ").strip()
@@ -7,10 +11,26 @@ TOKEN = os.getenv("HF_TOKEN") or input("Enter your Hugging Face Write Token: ").
 FILES_TO_UPLOAD = [
     "machine-learning/model/BEST_MODEL.pkl",
     "machine-learning/model/scaler.pkl",
-    "machine-learning/model/onehot_encoder.pkl"
+    "machine-learning/model/onehot_encoder.pkl",
+    "machine-learning/model/iqr_bounds.json",
+    "machine-learning/model/segments.json",
+    "machine-learning/model/logreg.pkl",
+    "machine-learning/model/mlp.keras",
+    "machine-learning/model/mlp.npz"
 ]
+MANIFEST_FILE = os.path.join("machine-learning/model", MANIFEST_NAME)
+# Built by scripts rather than committed; without them the API falls back silently, so they must be published.
+GENERATED_FILES = {
+    "machine-learning/model/segments.json": "python save_segments.py (or the export cell of notebook/clustering.ipynb)",
+}
 
 def upload_models():
+    missing = [path for path in GENERATED_FILES if not os.path.exists(path)]
+    for path in missing:
+        print(f"❌ {path} not found; create it with: {GENERATED_FILES[path]}")
+    if missing:
+        return
+
     api = HfApi(token=TOKEN)
     print(f"Checking/Creating repository: {REPO_ID}...")
     try:
@@ -19,20 +39,28 @@ def upload_models():
         print(f"Error creating repo: {e}")
         return
 
-    print("Starting upload...")
+    present = [path for path in FILES_TO_UPLOAD if os.path.exists(path)]
+    print(f"Writing {MANIFEST_FILE} (sha256 + size)...")
+    write_manifest(MANIFEST_FILE, build_manifest(present))
+
     for file_path in FILES_TO_UPLOAD:
-        if os.path.exists(file_path):
-            file_name = os.path.basename(file_path)
-            print(f"Uploading {file_name}...")
-            api.upload_file(
-                path_or_fileobj=file_path,
-                path_in_repo=file_name,
-                repo_id=REPO_ID,
-                repo_type="model"
-            )
-        else:
+        if not os.path.exists(file_path):
             print(f"⚠️ Warning: File not found locally: {file_path}")
 
+    # One hub commit for every file and the manifest: clients see either the
+    # previous artifact set or this one, never new files next to old hashes.
+    operations = [
+        CommitOperationAdd(path_in_repo=os.path.basename(file_path), path_or_fileobj=file_path)
+        for file_path in present + [MANIFEST_FILE]
+    ]
+    print(f"Uploading {', '.join(op.path_in_repo for op in operations)} in one commit...")
+    api.create_commit(
+        repo_id=REPO_ID,
+        repo_type="model",
+        operations=operations,
+        commit_message="Publish model artifacts",
+    )
+
     print("\n✅ Upload complete! You can now use this repo in your app.")
 
 if __name__ == "__main__":